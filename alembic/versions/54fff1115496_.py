@@ -0,0 +1,51 @@
+"""bigram index for Korean search on approved translations
+
+Revision ID: 54fff1115496
+Revises: fedaf45b40f2
+Create Date: 2026-10-18 00:47:08.952392
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '54fff1115496'
+down_revision = 'fedaf45b40f2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Distinct pairs of adjacent characters, case-folded
+    op.execute(
+        '''
+        CREATE FUNCTION text_bigrams(text) RETURNS text[]
+        LANGUAGE sql IMMUTABLE STRICT PARALLEL SAFE
+        AS $$
+            SELECT coalesce(array_agg(DISTINCT substr(lower($1), i, 2)), '{}')
+            FROM generate_series(1, char_length($1) - 1) AS i
+        $$
+        '''
+    )
+    op.create_index(
+        'translation_idx_translation_bigrams',
+        'translation',
+        [sa.text('text_bigrams(translation)')],
+        unique=False,
+        postgresql_using='gin',
+        postgresql_where=sa.text("status = 'APPROVED'"),
+    )
+    # ANALYZE skips expressions of partial indexes. Without statistics, common
+    # keywords are estimated to be rare and every match is fetched to find a page
+    op.execute(
+        'CREATE STATISTICS translation_stat_bigrams '
+        'ON (text_bigrams(translation)) FROM translation'
+    )
+    op.execute('ANALYZE translation')
+
+
+def downgrade():
+    op.execute('DROP STATISTICS translation_stat_bigrams')
+    op.drop_index('translation_idx_translation_bigrams', table_name='translation')
+    op.execute('DROP FUNCTION text_bigrams(text)')
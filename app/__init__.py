@@ -1,3 +1,5 @@
+import asyncio
+
 import aiohttp
 from sanic import Sanic
 from gino.ext.sanic import Gino
@@ -43,11 +45,71 @@ def init_oauth(app):
         await sanic_app.async_session.close()
 
 
+def init_executor(app):
+    from app.core.executor import BoundedExecutor
+
+    @app.listener("after_server_start")
+    async def init_subtitle_executor(sanic_app, _loop) -> None:
+        sanic_app.subtitle_executor = BoundedExecutor(
+            config.SUBTITLE_WORKERS,
+            config.SUBTITLE_QUEUE_LIMIT,
+            use_processes=config.SUBTITLE_EXECUTOR == "process",
+        )
+
+    @app.listener("before_server_stop")
+    async def close_subtitle_executor(sanic_app, _loop) -> None:
+        sanic_app.subtitle_executor.shutdown()
+
+
+def init_genre_catalog(app):
+    from app.services import genre as genre_service
+
+    @app.listener("after_server_start")
+    async def warm_up_genre_catalog(sanic_app, _loop) -> None:
+        await genre_service.catalog.reload()
+
+
+def init_feed(app):
+    from app.services import feed as feed_service
+
+    @app.listener("after_server_start")
+    async def start_feed_refresh(sanic_app, loop) -> None:
+        sanic_app.feed_task = loop.create_task(feed_service.pool.run())
+
+    @app.listener("before_server_stop")
+    async def stop_feed_refresh(sanic_app, _loop) -> None:
+        sanic_app.feed_task.cancel()
+
+
+def init_like_buffers(app):
+    from app.services import like as like_service
+
+    buffers = (like_service.line_likes, like_service.translation_likes)
+
+    @app.listener("after_server_start")
+    async def start_like_flush(sanic_app, loop) -> None:
+        sanic_app.like_tasks = [loop.create_task(each.run()) for each in buffers]
+
+    @app.listener("before_server_stop")
+    async def stop_like_flush(sanic_app, _loop) -> None:
+        # Each task flushes what is left when cancelled
+        for task in sanic_app.like_tasks:
+            task.cancel()
+        await asyncio.gather(*sanic_app.like_tasks, return_exceptions=True)
+
+
 def init_error_handler(app):
+    from app.exceptions import InvalidCursor, InvalidKeyword
+    from app.utils import JsonResponse
+
     @app.exception(pydantic.ValidationError)
     async def handle_validation_error(request, e):
         return text(e.json(), status=422)
 
+    @app.exception(InvalidKeyword, InvalidCursor)
+    async def handle_bad_query(request, e):
+        return JsonResponse({"message": str(e)}, status=400)
+
 
 def create_app():
     """
@@ -56,11 +118,17 @@ def create_app():
     app = Sanic(name="engster")
     app.config.from_object(config)
     init_oauth(app)
+    init_executor(app)
     init_jwt(app)
     init_error_handler(app)
 
     CORS(app)
     db.init_app(app)
+    # After the database is bound on start, and before it is closed on stop
+    init_genre_catalog(app)
+    init_feed(app)
+    if config.LIKE_WRITE_BEHIND:
+        init_like_buffers(app)
     from app import views
 
     views.init_app(app)
@@ -18,6 +18,24 @@ DB_HOST = os.getenv("DB_HOST", "127.0.0.1")
 DB_USER = os.getenv("DB_USER", "user")
 DB_PASSWORD = os.getenv("DB_PASSWORD", "password")
 DB_URL = f"postgres://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_DATABASE}"
+# Statements are prepared, and a generic plan can't tell a rare search keyword
+# from a common one. Plan with the actual keyword so that indexes are used.
+DB_KWARGS = {"server_settings": {"plan_cache_mode": "force_custom_plan"}}
+
+# Search result counts: "exact", "cached", "capped" or "estimate".
+# See `app.utils.count_rows`
+SUBTITLE_SEARCH_COUNT = os.getenv("SUBTITLE_SEARCH_COUNT", "capped")
+TRANSLATION_SEARCH_COUNT = os.getenv("TRANSLATION_SEARCH_COUNT", "capped")
+BILINGUAL_SEARCH_COUNT = os.getenv("BILINGUAL_SEARCH_COUNT", "capped")
+SEARCH_COUNT_CAP = int(os.getenv("SEARCH_COUNT_CAP", "1000"))
+# Seconds and number of keywords the "cached" counts are kept for
+SEARCH_COUNT_TTL = int(os.getenv("SEARCH_COUNT_TTL", "300"))
+SEARCH_COUNT_CACHE_SIZE = int(os.getenv("SEARCH_COUNT_CACHE_SIZE", "1024"))
+
+# Pages of search results are kept for SEARCH_CACHE_TTL seconds in each worker,
+# or until subtitles, approved translations or contents change
+SEARCH_CACHE_TTL = int(os.getenv("SEARCH_CACHE_TTL", "60"))
+SEARCH_CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", "1024"))
 
 # JWT
 
@@ -53,6 +71,26 @@ JWT = {
     "default_iss": "engster.co.kr",
 }
 
+# Suggestions are phrases of up to SUGGESTION_MAX_WORDS words of English lines
+SUGGESTION_MAX_WORDS = int(os.getenv("SUGGESTION_MAX_WORDS", "3"))
+
+# The home feed serves FEED_POOL_SIZE lines picked and enriched in the background,
+# reloaded every FEED_REFRESH_INTERVAL seconds and on uploads
+FEED_POOL_SIZE = int(os.getenv("FEED_POOL_SIZE", "3000"))
+FEED_REFRESH_INTERVAL = int(os.getenv("FEED_REFRESH_INTERVAL", "300"))
+
+# Genres and genres of each content are cached in each worker. Edits through
+# the API invalidate them at once in the worker, and in the others after this
+GENRE_CACHE_TTL = int(os.getenv("GENRE_CACHE_TTL", "300"))
+
+# Likes are written every LIKE_FLUSH_INTERVAL seconds in batches, instead of
+# one by one, when LIKE_WRITE_BEHIND is true
+LIKE_WRITE_BEHIND = os.getenv("LIKE_WRITE_BEHIND", "false").lower() == "true"
+LIKE_FLUSH_INTERVAL = float(os.getenv("LIKE_FLUSH_INTERVAL", "1"))
+
+# Signs pagination cursors
+CURSOR_SECRET_KEY = os.getenv("CURSOR_SECRET_KEY", JWT["secret_key"])
+
 # Social Auth
 GOOGLE_CLIENT_ID = os.getenv("GOOGLE_CLIENT_ID")
 GOOGLE_CLIENT_SECRET = os.getenv("GOOGLE_CLIENT_SECRET")
@@ -66,6 +104,13 @@ EMAIL_PASSWORD = os.getenv("EMAIL_PASSWORD")
 EMAIL_SMTP_HOST = os.getenv("EMAIL_SMTP_HOST", "127.0.0.1")
 EMAIL_SMTP_PORT = os.getenv("EMAIL_SMTP_PORT", 1025)
 
+# Subtitle conversion runs off the event loop in a pool of "process" or "thread"
+# Processes fall back to threads where they can't be created, such as AWS Lambda
+SUBTITLE_EXECUTOR = os.getenv("SUBTITLE_EXECUTOR", "process")
+SUBTITLE_WORKERS = int(os.getenv("SUBTITLE_WORKERS", "2"))
+# Conversions waiting for a free worker. More than this are rejected with 503
+SUBTITLE_QUEUE_LIMIT = int(os.getenv("SUBTITLE_QUEUE_LIMIT", "4"))
+
 AWS_ACCESS_KEY_ID = os.getenv("AWS_ACCESS_ID")
 AWS_SECRET_ACCESS_KEY = os.getenv("AWS_SECRET")
 AWS_BUCKET_NAME = os.getenv("AWS_BUCKET_NAME")
@@ -0,0 +1,75 @@
+"""
+Writes acknowledged at once and applied later in batches
+"""
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+import asyncio
+
+from sanic.log import logger
+
+
+class WriteBehindBuffer:
+    """Latest value of each key, written by `write` in batches
+
+    Setting a key again before it is written replaces its value, so only
+    the last of repeated writes reaches the database. `run` writes every
+    `interval` seconds until it is cancelled, and writes that fail are kept
+    to be tried again. `get` sees values until they are written.
+
+    Args:
+        write: coroutine function writing a dict of keys and values
+        interval: seconds between writes
+    """
+
+    def __init__(
+        self, write: Callable[[Dict[Hashable, Any]], Awaitable[None]], interval: float
+    ):
+        self.write = write
+        self.interval = interval
+        self._pending: Dict[Hashable, Any] = {}
+        self._writing: Dict[Hashable, Any] = {}
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self._pending[key] = value
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Get the value not written yet, or None"""
+        if key in self._pending:
+            return self._pending[key]
+        return self._writing.get(key)
+
+    def __len__(self):
+        return len(self._pending) + len(self._writing)
+
+    async def flush(self) -> int:
+        """Write pending values
+
+        Returns:
+            count of keys written
+        """
+        if not self._pending:
+            return 0
+        self._writing, self._pending = self._pending, {}
+        try:
+            await self.write(self._writing)
+        except BaseException:
+            # Values set meanwhile are newer
+            self._pending = {**self._writing, **self._pending}
+            raise
+        finally:
+            written, self._writing = len(self._writing), {}
+        return written
+
+    async def run(self) -> None:
+        """Flush every interval. Pending values are flushed once more on cancel"""
+        try:
+            while True:
+                await asyncio.sleep(self.interval)
+                await self._try_flush()
+        finally:
+            await self._try_flush()
+
+    async def _try_flush(self) -> None:
+        try:
+            await self.flush()
+        except Exception:
+            logger.exception("Failed to write %d buffered values", len(self))
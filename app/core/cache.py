@@ -0,0 +1,222 @@
+"""
+Caches of query results
+
+`TTLCache` lives in the process. `ResultCache` adds a namespace that can be
+invalidated at once and hit/miss statistics, and keeps its entries in a
+`CacheBackend`, which a store shared by the app workers can implement.
+`SnapshotCache` keeps a small table, or a few, loaded at once.
+"""
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+import abc
+import json
+import time
+
+
+class TTLCache:
+    """LRU cache whose entries expire `ttl` seconds after they are set
+
+    Args:
+        maxsize: number of entries kept. The least recently used one is evicted
+        ttl: seconds an entry lives
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: Hashable, default: Optional[Any] = None) -> Any:
+        try:
+            expires_at, value = self._entries[key]
+        except KeyError:
+            return default
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return default
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Set a value living `ttl` seconds, or the ttl of the cache"""
+        ttl = self.ttl if ttl is None else ttl
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _missing) is not _missing
+
+    def __len__(self):
+        return len(self._entries)
+
+
+_missing = object()
+
+
+class CacheBackend(abc.ABC):
+    """Store of `ResultCache` entries
+
+    Keys are prefixed with the namespace of the cache, and values are
+    JSON serializable. A store shared by app workers, such as Redis, also
+    shares invalidations.
+    """
+
+    @abc.abstractmethod
+    async def get(self, key: str) -> Optional[Any]:
+        """Get a value, or None if the key is missing or expired"""
+
+    @abc.abstractmethod
+    async def set(self, key: str, value: Any, ttl: float) -> None:
+        pass
+
+    @abc.abstractmethod
+    async def clear(self, namespace: str) -> None:
+        """Drop every key of a namespace"""
+
+
+class LocalBackend(CacheBackend):
+    """Entries kept in the process, for a single namespace"""
+
+    def __init__(self, maxsize: int = 1024):
+        self.entries = TTLCache(maxsize)
+
+    async def get(self, key: str) -> Optional[Any]:
+        return self.entries.get(key)
+
+    async def set(self, key: str, value: Any, ttl: float) -> None:
+        self.entries.set(key, value, ttl)
+
+    async def clear(self, namespace: str) -> None:
+        self.entries.clear()
+
+
+# Caches by namespace, for statistics
+CACHES: Dict[str, Any] = {}
+
+
+class ResultCache:
+    """Cache of query results that is invalidated when the data changes
+
+    Without a backend, entries are kept in the process, and invalidation
+    doesn't reach the other workers, which see a change only after `ttl`
+    seconds. Read `version` before querying, and pass it to `set`, so that
+    a result queried before an invalidation of this worker is not kept.
+
+    Args:
+        namespace: name of the cache, also prefixed to the keys
+        maxsize: number of entries kept in the process without a backend
+        ttl: seconds an entry lives
+        backend: store of the entries, a `LocalBackend` by default
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        maxsize: int = 1024,
+        ttl: float = 60,
+        backend: Optional[CacheBackend] = None,
+    ):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.backend = backend or LocalBackend(maxsize)
+        self.hits = 0
+        self.misses = 0
+        # Bumped on invalidation
+        self.version = 0
+        CACHES[namespace] = self
+
+    def _key(self, key: Tuple) -> str:
+        return f"{self.namespace}:{json.dumps(key, ensure_ascii=False)}"
+
+    async def get(self, *key: Hashable) -> Optional[Any]:
+        """Get a cached value, or None"""
+        value = await self.backend.get(self._key(key))
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, *key: Hashable, value: Any, version: int) -> None:
+        """Cache a value queried at `version`, unless invalidated since"""
+        if version == self.version:
+            await self.backend.set(self._key(key), value, self.ttl)
+
+    async def invalidate(self) -> None:
+        """Drop every entry"""
+        self.version += 1
+        await self.backend.clear(self.namespace)
+
+    def stats(self) -> Dict[str, Any]:
+        requests = self.hits + self.misses
+        local = isinstance(self.backend, LocalBackend)
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / requests if requests else None,
+            "size": len(self.backend.entries) if local else None,
+            "maxsize": self.backend.entries.maxsize if local else None,
+            "ttl": self.ttl,
+        }
+
+
+class SnapshotCache:
+    """Data loaded at once by `load`, kept in the process until invalidated
+
+    The other workers see a change only after `ttl` seconds.
+
+    Args:
+        namespace: name of the cache
+        load: coroutine function returning the data
+        ttl: seconds the data lives
+    """
+
+    def __init__(
+        self, namespace: str, load: Callable[[], Awaitable[Any]], ttl: float = 300
+    ):
+        self.namespace = namespace
+        self.load = load
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._value: Any = _missing
+        self._expires_at = 0.0
+        # Bumped on invalidation, so that a load running meanwhile is not kept
+        self._version = 0
+        CACHES[namespace] = self
+
+    async def get(self) -> Any:
+        if self._value is not _missing and self._expires_at > time.monotonic():
+            self.hits += 1
+            return self._value
+        self.misses += 1
+        return await self.reload()
+
+    async def reload(self) -> Any:
+        """Load the data regardless of the cached one"""
+        version = self._version
+        value = await self.load()
+        if version == self._version:
+            self._value = value
+            self._expires_at = time.monotonic() + self.ttl
+        return value
+
+    async def invalidate(self) -> None:
+        self._version += 1
+        self._value = _missing
+
+    def stats(self) -> Dict[str, Any]:
+        requests = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / requests if requests else None,
+            "size": None,
+            "maxsize": None,
+            "ttl": self.ttl,
+        }
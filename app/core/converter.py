@@ -0,0 +1,141 @@
+"""
+Convert subtitle files into csv files that can be uploaded to `/subtitles`
+"""
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+import io
+import os
+
+from app.core.encoding import SUPERSETS, detect_stream_encoding
+from app.core.subtitle import SubtitleList, SubtitleMatcher, find_format
+from app.exceptions import UnsupportedExtension
+
+
+# Bytes decoded to find the format of a file by its header
+HEAD_SIZE = 256
+
+
+def read_stream(filename: str, stream: BinaryIO) -> Tuple[SubtitleList, str]:
+    """Read subtitle file from a seekable binary stream by its header or extension
+
+    The encoding is detected from a sample, and cues are parsed while the
+    stream is decoded, so the decoded text is never held at once.
+
+    Returns:
+        (subtitles, detected encoding of the file)
+    """
+    encoding = detect_stream_encoding(stream)
+    codec = SUPERSETS.get(encoding, encoding)
+    position = stream.tell()
+    head = stream.read(HEAD_SIZE).decode(codec, "ignore")
+    stream.seek(position)
+
+    reader = find_format(filename, head)
+    if reader is None:
+        ext = filename.rsplit(".", 1)[-1].lower()
+        raise UnsupportedExtension(f"Extension '{ext}' not supported")
+    # Characters that can't be decoded are replaced, as `decode` does
+    return reader.read_stream(stream, codec, "replace"), encoding
+
+
+def read(filename: str, body: bytes) -> Tuple[SubtitleList, str]:
+    return read_stream(filename, io.BytesIO(body))
+
+
+def read_file(path: str) -> Tuple[SubtitleList, str]:
+    with open(path, "rb") as f:
+        return read_stream(path, f)
+
+
+def convert(
+    subtitle_name: str,
+    subtitle_body: bytes,
+    translation_name: Optional[str] = None,
+    translation_body: Optional[bytes] = None,
+    mode: str = "start",
+) -> Tuple[str, Dict[str, str]]:
+    """Convert uploaded subtitle files into csv text
+
+    Returns:
+        (csv text, detected encoding by file name)
+    """
+    subtitle, encoding = read(subtitle_name, subtitle_body)
+    encodings = {subtitle_name: encoding}
+    if translation_name is not None:
+        translation, encodings[translation_name] = read(
+            translation_name, translation_body
+        )
+        subtitle = SubtitleMatcher(subtitle, translation, mode=mode).match()
+    return subtitle.to_csv().getvalue(), encodings
+
+
+def find_pairs(
+    directory: str, subtitle_ext: str = "srt", translation_ext: str = "smi"
+) -> List[Tuple[str, Optional[str]]]:
+    """Find subtitle files and translation files sharing the same name
+
+    Returns:
+        list of (subtitle path, translation path or None)
+    """
+    files: Dict[Tuple[str, str], str] = {}
+    for filename in sorted(os.listdir(directory)):
+        name, _, ext = filename.rpartition(".")
+        files[(name, ext.lower())] = os.path.join(directory, filename)
+
+    return [
+        (path, files.get((name, translation_ext)))
+        for (name, ext), path in files.items()
+        if ext == subtitle_ext
+    ]
+
+
+def convert_pair(
+    subtitle_path: str,
+    translation_path: Optional[str],
+    output_path: str,
+    mode: str = "start",
+) -> int:
+    """Read, match and write a pair of subtitle files as csv
+
+    Returns:
+        number of lines written
+    """
+    subtitle, _ = read_file(subtitle_path)
+    if translation_path:
+        translation, _ = read_file(translation_path)
+        subtitle = SubtitleMatcher(subtitle, translation, mode=mode).match()
+
+    with open(output_path, "w", encoding="utf-8-sig", newline="") as f:
+        f.write(subtitle.to_csv().getvalue())
+    return len(subtitle)
+
+
+def convert_all(
+    pairs: List[Tuple[str, Optional[str]]],
+    output_dir: str,
+    mode: str = "start",
+    workers: Optional[int] = None,
+) -> Iterator[Tuple[str, Optional[int], Optional[Exception]]]:
+    """Convert pairs across processes, one pair per task
+
+    Args:
+        workers: number of processes. Defaults to the number of cores
+
+    Yields:
+        (output path, number of lines or None, exception or None) as they finish
+    """
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as executor:
+        futures = {}
+        for subtitle_path, translation_path in pairs:
+            name = os.path.splitext(os.path.basename(subtitle_path))[0]
+            output_path = os.path.join(output_dir, f"{name}.csv")
+            future = executor.submit(
+                convert_pair, subtitle_path, translation_path, output_path, mode
+            )
+            futures[future] = output_path
+
+        for future in as_completed(futures):
+            try:
+                yield futures[future], future.result(), None
+            except Exception as e:
+                yield futures[future], None, e
@@ -0,0 +1,125 @@
+"""
+Detect the encoding of uploaded subtitle files
+
+Subtitle files come from many tools, so they arrive as utf-8 (with or without BOM),
+utf-16 or one of the Korean legacy encodings.
+Only a sample of the file is inspected so that the whole body is decoded once,
+or a stream is decoded while it is read.
+"""
+from typing import BinaryIO, Optional, Tuple, Union
+import codecs
+import io
+
+SAMPLE_SIZE = 4 * 1024
+
+BOMS = (
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+# Tried in order on the first non-ascii part of the file.
+# cp949 is a superset of euc-kr, which covers hangul outside of KS X 1001
+CANDIDATES = ("utf-8", "euc-kr", "cp949")
+
+# Encoding of files that match none of the candidates
+FALLBACK = "cp949"
+
+# Codecs used to decode detected encodings.
+# The sample may miss cp949 only characters in the rest of euc-kr file
+SUPERSETS = {"euc-kr": "cp949"}
+
+
+def _detect_utf16(sample: memoryview) -> Optional[str]:
+    """Find utf-16 without BOM from the NUL bytes of ascii characters"""
+    sample = bytes(sample[: len(sample) & ~1])
+    if not sample or b"\x00" not in sample:
+        return None
+
+    even_nulls = sample[0::2].count(0)
+    odd_nulls = sample[1::2].count(0)
+    half = len(sample) // 2
+    if odd_nulls > half * 0.3 and even_nulls < odd_nulls * 0.1:
+        return "utf-16-le"
+    if even_nulls > half * 0.3 and odd_nulls < even_nulls * 0.1:
+        return "utf-16-be"
+    return None
+
+
+def _is_valid(sample: bytes, encoding: str, final: bool) -> bool:
+    decoder = codecs.getincrementaldecoder(encoding)()
+    try:
+        decoder.decode(sample, final)
+    except UnicodeDecodeError:
+        return False
+    return True
+
+
+def detect_encoding(
+    body: Union[bytes, memoryview], sample_size: int = SAMPLE_SIZE
+) -> str:
+    """Guess the encoding of subtitle file from a sample of its content
+
+    Args:
+        body: content of the file
+        sample_size: number of bytes inspected
+
+    Returns:
+        name of the encoding
+    """
+    return detect_stream_encoding(io.BytesIO(body), sample_size)
+
+
+def detect_stream_encoding(stream: BinaryIO, sample_size: int = SAMPLE_SIZE) -> str:
+    """Same as `detect_encoding` for a seekable binary stream
+
+    Blocks of ascii are read and dropped until the sample, so no more than
+    the sample is held. The stream is moved back to where it was.
+    """
+    position = stream.tell()
+    try:
+        head = stream.read(sample_size)
+        for bom, encoding in BOMS:
+            if head[: len(bom)] == bom:
+                return encoding
+
+        encoding = _detect_utf16(memoryview(head))
+        if encoding:
+            return encoding
+
+        # ascii is shared by every candidate, so the sample starts from the block
+        # with the first character that tells them apart
+        block = head
+        while block.isascii():
+            block = stream.read(sample_size)
+            if not block:
+                return "utf-8"
+
+        sample = block + stream.read(sample_size * 2 - len(block))
+        final = not stream.read(1)
+        for encoding in CANDIDATES:
+            if _is_valid(sample, encoding, final):
+                return encoding
+        return FALLBACK
+    finally:
+        stream.seek(position)
+
+
+def decode(body: Union[bytes, memoryview]) -> Tuple[str, str]:
+    """Decode subtitle file with the detected encoding
+
+    Characters that can't be decoded are replaced with U+FFFD instead of dropped,
+    which only happens when the file is broken after the inspected sample.
+
+    Returns:
+        (decoded text, name of the encoding)
+    """
+    view = memoryview(body)
+    encoding = detect_encoding(body)
+    codec = SUPERSETS.get(encoding, encoding)
+    try:
+        return str(view, codec), encoding
+    except UnicodeDecodeError:
+        return str(view, codec, "replace"), encoding
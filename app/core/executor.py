@@ -0,0 +1,63 @@
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Optional
+import asyncio
+
+from sanic.log import logger
+
+from app.exceptions import ExecutorBusy
+
+
+class BoundedExecutor:
+    """Run blocking functions off the event loop with a bounded backlog
+
+    At most `max_workers` calls run at once and `max_pending` more wait for
+    a free worker. Further calls are rejected with ExecutorBusy instead of
+    queueing up, so they can't pile up behind long-running ones.
+
+    The pool is created on the first call. Processes fall back to threads
+    where they can't be created, such as AWS Lambda, which has no /dev/shm.
+    """
+
+    def __init__(self, max_workers: int, max_pending: int, use_processes: bool = True):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.use_processes = use_processes
+        self._executor: Optional[Executor] = None
+        self._running = 0
+
+    @property
+    def saturated(self) -> bool:
+        return self._running >= self.max_workers + self.max_pending
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            if self.use_processes:
+                try:
+                    self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+                except OSError:
+                    logger.warning("Failed to create processes, using threads instead")
+                    self.use_processes = False
+            if not self.use_processes:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        if self.saturated:
+            raise ExecutorBusy()
+
+        loop = asyncio.get_event_loop()
+        future = self.executor.submit(partial(func, *args, **kwargs))
+        self._running += 1
+        # Released when the call is done rather than when the caller stops waiting,
+        # as a call keeps running after the request is cancelled
+        future.add_done_callback(lambda _: loop.call_soon_threadsafe(self._release))
+        return await asyncio.wrap_future(future)
+
+    def _release(self) -> None:
+        self._running -= 1
+
+    def shutdown(self, wait: bool = True) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
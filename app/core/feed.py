@@ -0,0 +1,60 @@
+"""
+Feed items kept in memory and served at random
+"""
+from typing import Any, Awaitable, Callable, List, Optional
+import asyncio
+import random
+import time
+
+from sanic.log import logger
+
+
+class FeedPool:
+    """Items loaded by `load`, served in random slices from memory
+
+    `run` reloads the items every `interval` seconds, or as soon as `refresh`
+    is called, until it is cancelled. The previous items are kept when a load fails.
+
+    Args:
+        load: coroutine function returning items
+        interval: seconds between loads
+    """
+
+    def __init__(self, load: Callable[[], Awaitable[List[Any]]], interval: float):
+        self.load = load
+        self.interval = interval
+        self.items: List[Any] = []
+        self.loaded_at: Optional[float] = None
+        self._refresh: Optional[asyncio.Event] = None
+
+    @property
+    def ready(self) -> bool:
+        """Whether items have been loaded"""
+        return self.loaded_at is not None
+
+    def sample(self, count: int) -> List[Any]:
+        """Pick `count` items randomly, or every item if there are fewer"""
+        return random.sample(self.items, min(count, len(self.items)))
+
+    def refresh(self) -> None:
+        """Reload items without waiting for the interval"""
+        if self._refresh is not None:
+            self._refresh.set()
+
+    async def reload(self) -> None:
+        self.items = await self.load()
+        self.loaded_at = time.monotonic()
+
+    async def run(self) -> None:
+        # Created here to be bound to the loop of the server
+        self._refresh = asyncio.Event()
+        while True:
+            self._refresh.clear()
+            try:
+                await self.reload()
+            except Exception:
+                logger.exception("Failed to load feed items")
+            try:
+                await asyncio.wait_for(self._refresh.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
@@ -0,0 +1,104 @@
+"""
+Keyset pagination with opaque cursors
+
+A page continues after the key of the last row of the previous page instead of
+skipping rows with OFFSET, so deep pages cost the same as the first one.
+The key is signed so that clients can't forge a cursor to reach other rows.
+"""
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+import base64
+import hashlib
+import hmac
+import json
+
+from app import config, db
+from app.exceptions import InvalidCursor
+
+SIGNATURE_SIZE = 16
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _sign(payload: bytes) -> bytes:
+    key = config.CURSOR_SECRET_KEY.encode()
+    return hmac.new(key, payload, hashlib.sha256).digest()[:SIGNATURE_SIZE]
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Encode the key of a row into a signed cursor"""
+    values = [
+        each.isoformat() if isinstance(each, datetime) else each for each in values
+    ]
+    payload = json.dumps(values, separators=(",", ":")).encode()
+    return f"{_b64encode(payload)}.{_b64encode(_sign(payload))}"
+
+
+def decode_cursor(cursor: str, columns: Sequence) -> Tuple:
+    """Decode a cursor into values of the key columns
+
+    Raises:
+        InvalidCursor: the cursor is malformed or not signed by this app
+    """
+    try:
+        payload, signature = (_b64decode(each) for each in cursor.split("."))
+        if not hmac.compare_digest(signature, _sign(payload)):
+            raise InvalidCursor()
+        values = json.loads(payload)
+        if len(values) != len(columns):
+            raise InvalidCursor()
+        return tuple(
+            datetime.fromisoformat(value)
+            if column.type.python_type is datetime
+            else value
+            for column, value in zip(columns, values)
+        )
+    except (ValueError, TypeError):
+        raise InvalidCursor()
+
+
+def paginate(
+    query, columns: Sequence, cursor: Optional[str], limit: int, descending=True
+):
+    """Order a query by key columns and take the page after `cursor`
+
+    One more row than `limit` is fetched to tell if there is a next page.
+    Pass the rows to `split_page`.
+
+    Args:
+        columns: columns that identify a row, like (created_at, id)
+        cursor: `next_cursor` of the previous page, or None for the first page
+    """
+    if cursor:
+        values = decode_cursor(cursor, columns)
+        key, after = db.tuple_(*columns), db.tuple_(*values)
+        query = query.where(key < after if descending else key > after)
+    order_by = [each.desc() if descending else each.asc() for each in columns]
+    return query.order_by(*order_by).limit(limit + 1)
+
+
+def split_page(
+    rows: List[Any], columns: Sequence, limit: int
+) -> Tuple[List[Any], Optional[str]]:
+    """Split rows fetched with `paginate` into the page and `next_cursor`
+
+    Rows are dicts from `fetch_all` or model instances.
+
+    Returns:
+        (rows of the page, cursor of the next page or None if it is the last page)
+    """
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    if isinstance(last, dict):
+        values = [last[each.name] for each in columns]
+    else:
+        values = [getattr(last, each.name) for each in columns]
+    return rows, encode_cursor(values)
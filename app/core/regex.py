@@ -0,0 +1,128 @@
+"""
+Check regex search keywords before they reach Postgres
+
+Keywords are POSIX regular expressions matched over whole tables, so only a
+subset of the syntax is accepted: the one whose cost stays close to a literal
+search. Backreferences, lookarounds and repeated groups that repeat inside
+can take much longer than the size of the table suggests.
+"""
+from app.exceptions import InvalidKeyword
+
+MAX_LENGTH = 100
+# Largest bound of `{m,n}`
+MAX_REPEAT = 20
+# `*`, `+` and `{m,}` in a keyword
+MAX_UNBOUNDED = 2
+# Escapes of character classes and word boundaries.
+# Other letters and digits are escapes like backreferences (\1) or code points
+CLASS_ESCAPES = frozenset("dDsSwWmMyY")
+
+
+def _find_bracket_end(pattern: str, start: int) -> int:
+    """Find `]` closing the bracket expression at `start`"""
+    i = start + 1
+    if pattern.startswith("^", i):
+        i += 1
+    if pattern.startswith("]", i):
+        i += 1
+    while i < len(pattern):
+        if pattern[i : i + 2] in ("[:", "[=", "[."):  # noqa:E203
+            end = pattern.find(pattern[i + 1] + "]", i + 2)
+            if end == -1:
+                break
+            i = end + 2
+        elif pattern[i] == "]":
+            return i
+        else:
+            i += 1
+    raise InvalidKeyword("Bracket expression is not closed")
+
+
+def _parse_bound(pattern: str, start: int):
+    """Parse `{m}`, `{m,}` or `{m,n}` at `start`
+
+    Returns:
+        (end of the bound, upper limit or None if unbounded)
+    """
+    end = pattern.find("}", start)
+    low, comma, high = pattern[start + 1 : end].partition(",")  # noqa:E203
+    if end == -1 or not low.isdigit() or (high and not high.isdigit()):
+        raise InvalidKeyword("Repetition should be like {m}, {m,} or {m,n}")
+    if not comma:
+        high = low
+    if high and int(high) > MAX_REPEAT:
+        raise InvalidKeyword(f"Repetition can't be more than {MAX_REPEAT}")
+    return end, int(high) if high else None
+
+
+def check_regex(pattern: str) -> None:
+    """Check that a regex keyword uses only the supported syntax
+
+    Supported are literal characters, `.`, bracket expressions, class escapes
+    (\\d, \\s, \\w, \\m, \\M, ...), anchors, alternation, groups and
+    quantifiers, where a repeated group can't have a quantifier inside.
+
+    Raises:
+        InvalidKeyword: the keyword is too long, malformed or unsupported
+    """
+    if len(pattern) > MAX_LENGTH:
+        raise InvalidKeyword(f"Keyword can't be longer than {MAX_LENGTH} characters")
+
+    # Whether each open group has a quantifier inside
+    groups = [False]
+    # What a quantifier would repeat: "atom", "group" or None
+    last = None
+    last_group_repeats = False
+    unbounded = 0
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\":
+            i += 1
+            if i == len(pattern):
+                raise InvalidKeyword("Keyword can't end with \\")
+            if pattern[i].isalnum() and pattern[i] not in CLASS_ESCAPES:
+                raise InvalidKeyword(f"Escape \\{pattern[i]} is not supported")
+            last = "atom"
+        elif char == "[":
+            i = _find_bracket_end(pattern, i)
+            last = "atom"
+        elif char == "(":
+            if pattern.startswith("(?", i):
+                if not pattern.startswith("(?:", i):
+                    raise InvalidKeyword("Only (?:...) groups are supported")
+                i += 2
+            groups.append(False)
+            last = None
+        elif char == ")":
+            if len(groups) == 1:
+                raise InvalidKeyword("Parentheses are not balanced")
+            last_group_repeats = groups.pop()
+            groups[-1] = groups[-1] or last_group_repeats
+            last = "group"
+        elif char in "|^$":
+            last = None
+        elif char in "*+?{":
+            if last is None:
+                raise InvalidKeyword(f"Nothing to repeat before {char}")
+            if last == "group" and last_group_repeats:
+                raise InvalidKeyword("Repeated group can't have a quantifier inside")
+            if char == "{":
+                i, limit = _parse_bound(pattern, i)
+                unbounded += limit is None
+            else:
+                unbounded += char != "?"
+            if pattern.startswith("?", i + 1):
+                i += 1
+            groups[-1] = True
+            last = None
+        else:
+            last = "atom"
+        i += 1
+
+    if len(groups) > 1:
+        raise InvalidKeyword("Parentheses are not balanced")
+    if unbounded > MAX_UNBOUNDED:
+        raise InvalidKeyword(
+            f"Keyword can have at most {MAX_UNBOUNDED} of *, + or {{m,}}"
+        )
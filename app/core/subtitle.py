@@ -1,24 +1,137 @@
+from typing import (
+    IO,
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    Union,
+)
+from array import array
+from itertools import islice
+from operator import itemgetter
 import abc
+import bisect
 import csv
+import heapq
+import html
 import re
 import io
 
 
-class SubtitleList(list):
+class SubtitleList:
+    """Columnar container of subtitle rows
+
+    Every field is kept in its own column instead of keeping a dict per row.
+    Integer fields (time, ids) are packed into array("i") and the others are
+    kept in lists. Rows are built as dicts only when they are accessed.
+    """
+
+    __slots__ = ("_columns", "_length")
+
+    def __init__(self, rows: Iterable[Dict[str, Any]] = ()):
+        self._columns: Dict[str, Union[array, list]] = {}
+        self._length = 0
+        self.extend(rows)
+
+    @classmethod
+    def from_columns(cls, columns: Dict[str, Iterable[Any]]) -> "SubtitleList":
+        """Create a subtitle list from columns of the same length"""
+        subtitles = cls()
+        subtitles._columns = {
+            key: cls._to_column(values) for key, values in columns.items()
+        }
+        lengths = {len(each) for each in subtitles._columns.values()}
+        if len(lengths) > 1:
+            raise ValueError("Columns must have the same length")
+        subtitles._length = lengths.pop() if lengths else 0
+        return subtitles
+
+    @staticmethod
+    def _to_column(values: Iterable[Any]) -> Union[array, list]:
+        values = list(values) if not isinstance(values, (array, list)) else values
+        try:
+            return array("i", values)
+        except (TypeError, OverflowError):
+            return list(values)
+
+    @property
+    def fields(self) -> List[str]:
+        return list(self._columns)
+
+    def column(self, key: str) -> Union[array, list]:
+        """Get the values of a field without building rows"""
+        try:
+            return self._columns[key]
+        except KeyError:
+            if self._length:
+                raise
+            return []
+
+    def append(self, row: Dict[str, Any]) -> None:
+        if not self._columns:
+            self._columns = {
+                key: array("i") if type(value) is int else []
+                for key, value in row.items()
+            }
+        elif row.keys() != self._columns.keys():
+            raise ValueError("All rows must have the same fields")
+
+        for key, column in self._columns.items():
+            try:
+                column.append(row[key])
+            except (TypeError, OverflowError):
+                # Not an integer column after all
+                self._columns[key] = column = list(column)
+                column.append(row[key])
+        self._length += 1
+
+    def extend(self, rows: Iterable[Dict[str, Any]]) -> None:
+        for row in rows:
+            self.append(row)
+
     def to_csv(self):
         csvfile = io.StringIO()
-        fields = list(self[0].keys())
-        writer = csv.DictWriter(csvfile, fieldnames=fields)
-        writer.writeheader()
-        for each in self:
-            writer.writerow(each)
+        writer = csv.writer(csvfile)
+        writer.writerow(self._columns.keys())
+        writer.writerows(zip(*self._columns.values()))
         return csvfile
 
+    def __getitem__(self, idx: Union[int, slice]):
+        if isinstance(idx, slice):
+            return self.from_columns(
+                {key: column[idx] for key, column in self._columns.items()}
+            )
+        if not self._columns:
+            raise IndexError("SubtitleList index out of range")
+        return {key: column[idx] for key, column in self._columns.items()}
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        keys = list(self._columns)
+        for values in zip(*self._columns.values()):
+            yield dict(zip(keys, values))
+
+    def __len__(self):
+        return self._length
+
+    def __eq__(self, other):
+        if not isinstance(other, (SubtitleList, list)):
+            return NotImplemented
+        return len(self) == len(other) and list(self) == list(other)
+
     def __repr__(self):
-        return super().__repr__()
+        return repr(list(self))
 
 
 class BaseSubtitle(abc.ABC):
+    # Used to find the reader of a file. See `register_format`
+    extensions: Tuple[str, ...] = ()
+    header: Optional[str] = None
+
     def __init__(self, text: str):
         self._subtitles = self.read(text)
 
@@ -34,182 +147,628 @@ class BaseSubtitle(abc.ABC):
     def __getattr__(self, key):
         return self._subtitles.__getattribute__(key)
 
+    @classmethod
+    def iter_cues(
+        cls, stream: IO, encoding: str = "utf-8", errors: str = "strict"
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield cues one by one from a text or binary stream
+
+        Only the lines of the cue being built are held in memory,
+        so the whole file is never decoded at once.
+
+        Args:
+            stream: text stream, or binary stream decoded with `encoding`
+        """
+        if isinstance(stream, io.TextIOBase):
+            yield from cls._iter_cues(stream)
+            return
+
+        lines = io.TextIOWrapper(stream, encoding=encoding, errors=errors, newline="\n")
+        try:
+            yield from cls._iter_cues(lines)
+        finally:
+            # Leave the caller's stream open
+            if not lines.closed:
+                lines.detach()
+
+    @classmethod
+    def read_stream(
+        cls, stream: IO, encoding: str = "utf-8", errors: str = "strict"
+    ) -> SubtitleList:
+        """Read every cue of a text or binary stream. See `iter_cues`"""
+        return SubtitleList(cls.iter_cues(stream, encoding, errors))
+
+    def read(self, text: str) -> SubtitleList:
+        return self.read_stream(io.StringIO(text))
+
+    @classmethod
     @abc.abstractmethod
-    def read(self, text: str):
+    def _iter_cues(cls, lines: Iterable[str]) -> Iterator[Dict[str, Any]]:
         pass
 
+    @staticmethod
+    def _join_lines(lines: List[str]) -> str:
+        """Join the text lines of a cue into a subtitle
+
+        Parentheses-only lines (sound descriptions) are removed, and so are
+        leading - or . of each line.
+        """
+        texts = []
+        for line in lines:
+            line = line.strip()
+            if not line or (line[0] == "(" and line[-1] == ")"):
+                continue
+            if line.startswith("- "):
+                line = line[2:]
+            elif line[0] == ".":
+                line = line.lstrip(".")
+            texts.append(line)
+        return " ".join(" ".join(texts).split())
 
-class SRTSubtitle(BaseSubtitle):
-    def _trim(self, text: str):
-        text = text.replace("\r", "")
-        # Remove html
-        text = re.sub(r"<[^>]*>", "", text)
-        # Remove numeric-only line
-        text = re.sub(r"^\d+$", "", text, flags=re.MULTILINE)
-        # Remove parentheses-only line
-        text = re.sub(r"^\(.*\)$", "", text, flags=re.MULTILINE)
-        # Remove starting - or . more than one
-        text = re.sub(r"^(- |\.+)", "", text, flags=re.MULTILINE)
-        # Adjust new line
-        text = re.sub(r"&nbsp;", "", text)
-        text = re.sub(r"\n+", "\n", text)
-        # I forgot this...
-        text = re.sub(r"([^\d])\n([^\d])", r"\g<1> \g<2>", text)
-        # Trim space taking larger space
-        text = re.sub(r" +", " ", text)
-        return text
 
-    def _process_time(self, time):
-        h, m, s = tuple(time.split(":"))
-        seconds = int(h) * 3600 + int(m) * 60 + int(s)
-        return seconds
+FORMATS_BY_EXTENSION: Dict[str, Type[BaseSubtitle]] = {}
+FORMATS_BY_HEADER: Dict[str, Type[BaseSubtitle]] = {}
 
-    def read(self, text: str):
-        text = self._trim(text)
-        lines = SubtitleList()
-        re_sync = r"(\d\d:\d\d:\d\d),\d+\s*-->\s*\d\d:\d\d:\d\d,\d+\s*"
-        iterator = re.finditer(re_sync, text, flags=re.IGNORECASE)
-        prev_start = 0
-        prev_seconds = 0
 
-        for each in iterator:
-            line = text[prev_start : each.start()]  # noqa
-            line = re.sub(re_sync, "", line).strip()  # Trim line
-            prev_start = each.start()
+def register_format(cls: Type[BaseSubtitle]) -> Type[BaseSubtitle]:
+    """Register a reader by its file extensions and header"""
+    for ext in cls.extensions:
+        FORMATS_BY_EXTENSION[ext] = cls
+    if cls.header:
+        FORMATS_BY_HEADER[cls.header.lower()] = cls
+    return cls
 
-            if not line.strip():
-                prev_seconds = self._process_time(each.group(1))
-                continue
 
-            lines.append({"time": prev_seconds, "subtitle": line})
-            prev_seconds = self._process_time(each.group(1))
+def find_format(filename: str, text: str = "") -> Optional[Type[BaseSubtitle]]:
+    """Find the reader of a subtitle file
 
-        # process last group
-        line = text[each.start() :]  # noqa:E203
-        line = re.sub(re_sync, "", line).strip()
-        time = self._process_time(each.group(1))
-        lines.append({"time": time, "subtitle": line})
+    The header the text starts with is trusted over the extension,
+    as files are often renamed by hand.
+    """
+    head = text[:64].lstrip("\ufeff \t\r\n").lower()
+    for header, cls in FORMATS_BY_HEADER.items():
+        if head.startswith(header):
+            return cls
+    ext = filename.rsplit(".", 1)[-1].lower()
+    return FORMATS_BY_EXTENSION.get(ext)
 
-        return lines
 
+def _parse_clock(time: str) -> int:
+    """Convert `[hh:]mm:ss.fff` into milliseconds"""
+    clock, _, fraction = time.strip().partition(".")
+    seconds = 0
+    for each in clock.split(":"):
+        seconds = seconds * 60 + int(each)
+    return seconds * 1000 + int(fraction[:3].ljust(3, "0"))
 
-class SMISubtitle(BaseSubtitle):
-    def _trim(self, text):
-        text = text.replace("\r", "")
-        extracted_text = re.search(
-            r"<BODY>.*</BODY>", text, flags=re.IGNORECASE | re.DOTALL
-        )
-        text = extracted_text.group() if extracted_text else ""
-        # Remove comments
-        text = re.sub(r"<!--.*-->", "", text, flags=re.DOTALL)
-        # Remove starting - or . more than one
-        text = re.sub(r"^(- |\.+)", "", text, flags=re.MULTILINE)
-        # Adjust new line
-        text = re.sub(r"&nbsp;", "", text)
-        text = re.sub(r"\n+", "\n", text)
-        # Trim space taking larger space
-        text = re.sub(r" +", " ", text)
-        # Replace <br>
-        text = re.sub(r"<br>\n*", " ", text, flags=re.IGNORECASE)
+
+def _strip_markup(text: str, open_: str, close: str) -> str:
+    """Remove every span from `open_` to `close` in a single scan"""
+    if open_ not in text:
         return text
+    parts = []
+    pos = 0
+    while True:
+        start = text.find(open_, pos)
+        end = text.find(close, start + 1) if start >= 0 else -1
+        if end < 0:
+            parts.append(text[pos:])
+            return "".join(parts)
+        parts.append(text[pos:start])
+        pos = end + 1
+
+
+@register_format
+class SRTSubtitle(BaseSubtitle):
+    """SubRip reader
+
+    Lines are trimmed and glued one by one while the text is walked once,
+    so cues are emitted as soon as the next sync line shows up.
+    Times are in milliseconds.
+    """
+
+    extensions = ("srt",)
+
+    re_sync = re.compile(r"(\d\d:\d\d:\d\d,\d+)\s*-->\s*(\d\d:\d\d:\d\d,\d+)\s*")
+    re_html = re.compile(r"<[^>]*>")
+    re_leading = re.compile(r"- |\.+")
+    re_spaces = re.compile(r" {2,}")
+
+    @classmethod
+    def _trim_line(cls, line: str) -> str:
+        """Trim a single line. Plain str checks guard every regex"""
+        if "\r" in line:
+            line = line.replace("\r", "")
+        if "<" in line:
+            # Remove html
+            line = cls.re_html.sub("", line)
+        if not line or line.isdecimal():
+            # Remove numeric-only line
+            return ""
+        if line[0] == "(" and line[-1] == ")" and len(line) > 1:
+            # Remove parentheses-only line
+            return ""
+        if line[0] in "-.":
+            # Remove starting - or . more than one
+            leading = cls.re_leading.match(line)
+            if leading:
+                line = line[leading.end() :]  # noqa:E203
+        if "&" in line:
+            line = line.replace("&nbsp;", "")
+        return line
+
+    @staticmethod
+    def _process_time(time: str) -> int:
+        """Convert `hh:mm:ss,mmm` into milliseconds"""
+        clock, fraction = time.split(",")
+        h, m, s = tuple(clock.split(":"))
+        seconds = int(h) * 3600 + int(m) * 60 + int(s)
+        return seconds * 1000 + int(fraction[:3].ljust(3, "0"))
 
-    def _process_time(self, time: int):
-        seconds = int(int(time) / 1000)
-        return seconds
+    @classmethod
+    def _join_parts(cls, parts: List[str]) -> str:
+        # Trim space taking larger space
+        return cls.re_spaces.sub(" ", "".join(parts)).strip()
+
+    @classmethod
+    def _iter_cues(cls, lines: Iterable[str]) -> Iterator[Dict[str, Any]]:
+        trim_line = cls._trim_line
+        parts: List[str] = []
+        prev_start = prev_end = 0
+        synced = False
+        prev_line = ""
+        prev_glued = False
+
+        for line in lines:
+            line = trim_line(line.rstrip("\n"))
+            if not line:
+                continue
 
-    def read(self, text):
-        text = self._trim(text)
-        lines = SubtitleList()
-        re_sync = r"<SYNC Start[\s]*=[\s]*([0-9]+)[\s]*>"
-        iterator = re.finditer(re_sync, text, flags=re.IGNORECASE)
-        prev_start = 0
-        prev_seconds = 0
+            # Two text lines are glued with a space unless either side of the
+            # line break is a digit (that is where sync lines start or end).
+            # The last character of a one-letter line can only be glued once.
+            glued = (
+                prev_line != ""
+                and not prev_line[-1].isdecimal()
+                and not line[0].isdecimal()
+                and not (prev_glued and len(prev_line) == 1)
+            )
+            parts.append(" " if glued else "\n")
+            prev_line, prev_glued = line, glued
+
+            if "-->" not in line:
+                parts.append(line)
+                continue
 
-        for each in iterator:
-            line = text[prev_start : each.start()]  # noqa
-            line = re.sub(r"(<.*?>|^[\s]*-|\(.*\))", "", line).strip()  # Trim line
-            prev_start = each.start()
+            pos = 0
+            for each in cls.re_sync.finditer(line):
+                parts.append(line[pos : each.start()])  # noqa:E203
+                subtitle = cls._join_parts(parts)
+                if subtitle:
+                    yield {
+                        "time": prev_start,
+                        "end_time": prev_end,
+                        "subtitle": subtitle,
+                    }
+                prev_start = cls._process_time(each.group(1))
+                prev_end = cls._process_time(each.group(2))
+                synced = True
+                parts = []
+                pos = each.end()
+            parts.append(line[pos:])
 
-            if not line.strip():
-                prev_seconds = self._process_time(each.group(1))
+        # process last group
+        if synced:
+            yield {
+                "time": prev_start,
+                "end_time": prev_end,
+                "subtitle": cls._join_parts(parts),
+            }
+
+
+@register_format
+class SMISubtitle(BaseSubtitle):
+    """SAMI reader
+
+    Only the <BODY> is read and it is walked line by line. `<br>` glues a line
+    to the next one, and a cue is emitted when the next <SYNC> tag shows up.
+    A cue ends where the next <SYNC> starts; the last one ends where it starts.
+    """
+
+    extensions = ("smi", "sami")
+    header = "<SAMI"
+
+    re_body_start = re.compile(r"<BODY>", flags=re.IGNORECASE)
+    re_body_end = re.compile(r"</BODY>", flags=re.IGNORECASE)
+    re_leading = re.compile(r"- |\.+")
+    re_spaces = re.compile(r" {2,}")
+    re_br = re.compile(r"<br>", flags=re.IGNORECASE)
+    re_sync = re.compile(r"<SYNC Start[\s]*=[\s]*([0-9]+)[\s]*>", flags=re.IGNORECASE)
+    re_trim = re.compile(r"(<.*?>|^[\s]*-|\(.*\))")
+
+    @staticmethod
+    def _process_time(time: str) -> int:
+        return int(time)
+
+    @classmethod
+    def _trim_chunk(cls, parts: List[str]) -> str:
+        return cls.re_trim.sub("", "".join(parts)).strip()
+
+    @classmethod
+    def _iter_cues(cls, lines: Iterable[str]) -> Iterator[Dict[str, Any]]:
+        parts: List[str] = []
+        prev_start = 0
+        synced = False
+        in_body = False
+        body_ended = False
+        comment_prefix = None  # text preceding a comment that is not closed yet
+        sep = ""
+
+        for line in lines:
+            line = line.rstrip("\n")
+            if "\r" in line:
+                line = line.replace("\r", "")
+
+            if not in_body:
+                body_start = cls.re_body_start.search(line)
+                if not body_start:
+                    continue
+                line = line[body_start.start() :]  # noqa:E203
+                in_body = True
+
+            body_end = cls.re_body_end.search(line)
+            if body_end:
+                line = line[: body_end.end()]
+                body_ended = True
+
+            # Remove comments
+            if comment_prefix is not None:
+                close = line.find("-->")
+                if close < 0:
+                    if body_ended:
+                        break
+                    continue
+                line = comment_prefix + line[close + 3 :]  # noqa:E203
+                comment_prefix = None
+            while "<!--" in line:
+                open_ = line.find("<!--")
+                close = line.find("-->", open_ + 4)
+                if close < 0:
+                    comment_prefix = line[:open_]
+                    break
+                line = line[:open_] + line[close + 3 :]  # noqa:E203
+            if comment_prefix is not None:
+                if body_ended:
+                    break
                 continue
 
-            lines.append({"time": prev_seconds, "subtitle": line})
-            prev_seconds = self._process_time(each.group(1))
+            if line and line[0] in "-.":
+                # Remove starting - or . more than one
+                leading = cls.re_leading.match(line)
+                if leading:
+                    line = line[leading.end() :]  # noqa:E203
+            if "&" in line:
+                line = line.replace("&nbsp;", "")
+
+            if line:
+                # Trim space taking larger space
+                if "  " in line:
+                    line = cls.re_spaces.sub(" ", line)
+                # Replace <br>, which also takes the following line break
+                parts.append(sep)
+                sep = "" if line[-4:].lower() == "<br>" else "\n"
+                if "<" in line:
+                    line = cls.re_br.sub(" ", line)
+
+                pos = 0
+                for each in cls.re_sync.finditer(line):
+                    parts.append(line[pos : each.start()])  # noqa:E203
+                    subtitle = cls._trim_chunk(parts)
+                    start = cls._process_time(each.group(1))
+                    if subtitle:
+                        yield {
+                            "time": prev_start,
+                            "end_time": start,
+                            "subtitle": subtitle,
+                        }
+                    prev_start = start
+                    synced = True
+                    parts = []
+                    pos = each.start()
+                parts.append(line[pos:])
+
+            if body_ended:
+                break
+
         # process last group
-        line = text[each.start() :]  # noqa:E203
-        time = self._process_time(each.group(1))
-        line = re.sub(r"(<.*?>|^[\s]*-|\(.*\))", "", line).strip()
-        lines.append({"time": time, "subtitle": line})
+        if synced:
+            yield {
+                "time": prev_start,
+                "end_time": prev_start,
+                "subtitle": cls._trim_chunk(parts),
+            }
+
+
+@register_format
+class VTTSubtitle(BaseSubtitle):
+    """WebVTT reader
+
+    The text is walked once, and a cue starts at each timing line and ends at
+    the next blank line. The header, NOTE, STYLE and REGION blocks are skipped,
+    and so are cue identifiers, cue settings and cues of malformed timing lines.
+    Tags (<i>, <v Name>, <00:00:01.000>) are removed and entities are unescaped.
+    """
+
+    extensions = ("vtt",)
+    header = "WEBVTT"
+
+    @staticmethod
+    def _trim_line(line: str) -> str:
+        line = _strip_markup(line, "<", ">")
+        if "&" in line:
+            line = html.unescape(line).replace("\xa0", " ")
+        return line
+
+    @classmethod
+    def _iter_cues(cls, lines: Iterable[str]) -> Iterator[Dict[str, Any]]:
+        parts: List[str] = []
+        start = end = 0
+        in_cue = False
+
+        for line in lines:
+            line = line.rstrip("\r\n")
+
+            if "-->" in line or not line.strip():
+                # A cue ends with a blank line or, if it is missing, the next timing
+                if in_cue:
+                    subtitle = cls._join_lines(parts)
+                    if subtitle:
+                        yield {"time": start, "end_time": end, "subtitle": subtitle}
+                    parts = []
+                in_cue = False
+                if "-->" in line:
+                    head, _, tail = line.partition("-->")
+                    try:
+                        start = _parse_clock(head)
+                        end = _parse_clock(tail.split(None, 1)[0])
+                    except (IndexError, ValueError):
+                        # The cue of a malformed timing line is skipped
+                        continue
+                    in_cue = True
+            elif in_cue:
+                parts.append(cls._trim_line(line))
+            # Lines out of cues are the header, cue identifiers or
+            # NOTE, STYLE and REGION blocks, none of which can contain "-->"
+
+        # process last cue, which is not followed by a blank line
+        if in_cue:
+            subtitle = cls._join_lines(parts)
+            if subtitle:
+                yield {"time": start, "end_time": end, "subtitle": subtitle}
+
+
+@register_format
+class ASSSubtitle(BaseSubtitle):
+    """Advanced SubStation Alpha (and SSA) reader
+
+    Only Dialogue lines of [Events] are read, split by the fields of its Format
+    line. Override blocks ({\\i1}) are removed and hard line breaks (\\N) are
+    joined with a space. Events need not be in time order, so `iter_cues` yields
+    cues in the order of the file, and `read_stream` sorts them by start time.
+    """
+
+    extensions = ("ass", "ssa")
+    header = "[Script Info]"
+
+    default_fields = [
+        "layer",
+        "start",
+        "end",
+        "style",
+        "name",
+        "marginl",
+        "marginr",
+        "marginv",
+        "effect",
+        "text",
+    ]
+
+    @classmethod
+    def read_stream(
+        cls, stream: IO, encoding: str = "utf-8", errors: str = "strict"
+    ) -> SubtitleList:
+        # sorted is stable, so cues starting at the same time keep their order
+        cues = cls.iter_cues(stream, encoding, errors)
+        return SubtitleList(sorted(cues, key=itemgetter("time")))
+
+    @staticmethod
+    def _trim_text(text: str) -> List[str]:
+        text = _strip_markup(text, "{", "}")
+        if "\\" in text:
+            text = text.replace("\\h", " ").replace("\\n", "\\N")
+        return text.split("\\N")
+
+    @classmethod
+    def _iter_cues(cls, lines: Iterable[str]) -> Iterator[Dict[str, Any]]:
+        fields = cls.default_fields
+        in_events = False
+
+        for line in lines:
+            line = line.strip()
+            if line.startswith("["):
+                in_events = line.lower() == "[events]"
+                continue
+            if not in_events:
+                continue
 
-        return lines
+            key, _, value = line.partition(":")
+            if key == "Format":
+                fields = [each.strip().lower() for each in value.split(",")]
+            elif key == "Dialogue":
+                event = dict(zip(fields, value.split(",", len(fields) - 1)))
+                subtitle = cls._join_lines(cls._trim_text(event.get("text", "")))
+                if subtitle:
+                    yield {
+                        "time": _parse_clock(event["start"]),
+                        "end_time": _parse_clock(event["end"]),
+                        "subtitle": subtitle,
+                    }
 
 
 class SubtitleMatcher:
-    def __init__(self, subtitles: SubtitleList, translations: SubtitleList):
+    """Match subtitles with translations by time
+
+    modes:
+        start: Each subtitle takes the translations that start before the next
+            subtitle does. Translations are walked once from left to right: when
+            their times are sorted, the end of each chunk is found by binary
+            search on the time column, otherwise by scanning from the current
+            position.
+        overlap: Each translation goes to the subtitle its interval overlaps
+            most. Subtitles without `end_time` end where the next one starts.
+    """
+
+    modes = ("start", "overlap")
+
+    def __init__(
+        self, subtitles: SubtitleList, translations: SubtitleList, mode: str = "start"
+    ):
+        if mode not in self.modes:
+            raise ValueError(f"Unknown match mode '{mode}'")
         self._subtitles = subtitles
         self._translations = translations
-
-    def _find_lte_idx(
-        self,
-        translations: SubtitleList,
-        current_sub: SubtitleList,
-        next_sub: SubtitleList,
-    ):
-        for idx, current_trans in enumerate(translations):
-            try:
-                next_trans = translations[idx + 1]
-            except IndexError:
-                next_trans = current_trans
-
-            if current_trans["time"] >= next_sub["time"]:
-                return translations[:idx]
-
-            if (
-                next_trans["time"] >= current_sub["time"]
-                and next_trans["time"] < next_sub["time"]
-            ):
+        self._mode = mode
+
+    @staticmethod
+    def _is_sorted(times: Sequence[int]) -> bool:
+        return all(prev <= each for prev, each in zip(times, islice(times, 1, None)))
+
+    @staticmethod
+    def _end_times(subtitles: SubtitleList) -> List[int]:
+        """Get end times, which are never before start times"""
+        starts = subtitles.column("time")
+        if "end_time" in subtitles.fields:
+            ends = subtitles.column("end_time")
+        else:
+            # Each one ends where the next one starts
+            ends = list(islice(starts, 1, None)) + list(starts[-1:])
+        return [max(start, end or 0) for start, end in zip(starts, ends)]
+
+    @staticmethod
+    def _count_sorted(
+        times: Sequence[int], start: int, current_time: int, next_time: int
+    ) -> int:
+        """Count translations from `start` to match with the current subtitle"""
+        end = bisect.bisect_left(times, next_time, start)
+        if end < len(times):
+            return end - start
+        # Every translation left starts before the next subtitle
+        return min(1, len(times) - start)
+
+    @staticmethod
+    def _count_unsorted(
+        times: Sequence[int], start: int, current_time: int, next_time: int
+    ) -> int:
+        """Same as `_count_sorted` for translations out of time order"""
+        last_idx = len(times) - 1
+        for idx in range(start, last_idx + 1):
+            current_trans = times[idx]
+            next_trans = times[idx + 1] if idx < last_idx else current_trans
+
+            if current_trans >= next_time:
+                return idx - start
+
+            if next_trans >= current_time and next_trans < next_time:
                 continue
 
-            if current_trans["time"] >= current_sub["time"]:
-                break
-        else:
-            idx = 0
+            if current_trans >= current_time:
+                return idx + 1 - start
 
-        return translations[: idx + 1]
+        return min(1, len(times) - start)
 
-    def _concat_translations(self, partition: SubtitleList):
-        translation = ""
-        for i, each in enumerate(partition):
-            if i != 0:
-                translation += " "
-            translation += each["subtitle"]
-        return translation
+    def _match_start(self) -> List[str]:
+        sub_times = self._subtitles.column("time")
+        trans_times = self._translations.column("time")
+        trans_texts = self._translations.column("subtitle")
+        count_translations = (
+            self._count_sorted
+            if self._is_sorted(trans_times)
+            else self._count_unsorted
+        )
+        translations = []
+        prev_idx = 0
+
+        for i, current_time in enumerate(sub_times):
+            if i + 1 < len(sub_times):
+                size = count_translations(
+                    trans_times, prev_idx, current_time, sub_times[i + 1]
+                )
+            else:
+                # Last subtitle
+                size = len(trans_times) - prev_idx
+
+            chunk = trans_texts[prev_idx : prev_idx + size]  # noqa:E203
+            translations.append(" ".join(chunk))
+            prev_idx += size
+        return translations
+
+    def _match_overlap(self) -> List[str]:
+        sub_starts = self._subtitles.column("time")
+        sub_ends = self._end_times(self._subtitles)
+        order = sorted(range(len(sub_starts)), key=sub_starts.__getitem__)
+        starts = [sub_starts[i] for i in order]
+        ends = [sub_ends[i] for i in order]
+
+        trans_starts = self._translations.column("time")
+        trans_ends = self._end_times(self._translations)
+        # Subtitles still running when a translation starts, as (end, position)
+        running: List[Tuple[int, int]] = []
+        next_idx = 0
+        matched = [0] * len(trans_starts)
+
+        # Translations are swept by start, so a subtitle that has ended before
+        # one starts can't overlap any later one and is dropped for good
+        for trans in sorted(range(len(trans_starts)), key=trans_starts.__getitem__):
+            trans_start, trans_end = trans_starts[trans], trans_ends[trans]
+            while next_idx < len(starts) and starts[next_idx] <= trans_start:
+                heapq.heappush(running, (ends[next_idx], next_idx))
+                next_idx += 1
+            while running and running[0][0] <= trans_start:
+                heapq.heappop(running)
+
+            best, best_overlap = None, 0
+            for end, idx in running:
+                overlap = min(trans_end, end) - trans_start
+                # Ties go to the earlier subtitle
+                if overlap > best_overlap or (
+                    overlap == best_overlap > 0 and idx < best
+                ):
+                    best, best_overlap = idx, overlap
+            # Subtitles starting inside the translation come after those
+            for idx in range(next_idx, bisect.bisect_left(starts, trans_end, next_idx)):
+                overlap = min(trans_end, ends[idx]) - starts[idx]
+                if overlap > best_overlap:
+                    best, best_overlap = idx, overlap
+
+            if best is None:
+                # No overlap: fall back to the subtitle started last before it
+                best = max(next_idx - 1, 0)
+            matched[trans] = best
+
+        chunks: Dict[int, List[str]] = {}
+        if starts:
+            for best, text in zip(matched, self._translations.column("subtitle")):
+                chunks.setdefault(order[best], []).append(text)
+        return [" ".join(chunks.get(i, ())) for i in range(len(sub_starts))]
 
     def match(self):
         """Match subtitle and translation"""
 
-        matched = SubtitleList()
-        prev_idx = 0
+        if self._mode == "overlap":
+            translations = self._match_overlap()
+        else:
+            translations = self._match_start()
 
-        for i, current_subtitle in enumerate(self._subtitles):
-            try:
-                next_subtitle = self._subtitles[i + 1]
-                trans_chunk = self._find_lte_idx(
-                    self._translations[prev_idx:], current_subtitle, next_subtitle
-                )
-            except IndexError:
-                # Last subtitle
-                trans_chunk = self._translations[prev_idx:]
-
-            new_translation = self._concat_translations(trans_chunk)
-            matched.append(
-                {
-                    "time": current_subtitle.pop("time"),
-                    "subtitle": current_subtitle.pop("subtitle"),
-                    "translation": new_translation,
-                    **current_subtitle,
-                }
-            )
-            prev_idx += len(trans_chunk)
-        return matched
+        columns = {key: self._subtitles.column(key) for key in self._subtitles.fields}
+        columns["translation"] = translations
+        return SubtitleList.from_columns(columns)
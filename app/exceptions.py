@@ -11,3 +11,18 @@ class InvalidDataFrame(Exception):
 class DataDoesNotExist(Exception):
     def __init__(self, msg="Data does not exist."):
         super().__init__(msg)
+
+
+class ExecutorBusy(Exception):
+    def __init__(self, msg="Too many tasks are in progress."):
+        super().__init__(msg)
+
+
+class InvalidKeyword(Exception):
+    def __init__(self, msg="The search keyword is not supported."):
+        super().__init__(msg)
+
+
+class InvalidCursor(Exception):
+    def __init__(self, msg="The cursor is invalid."):
+        super().__init__(msg)
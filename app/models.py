@@ -1,6 +1,6 @@
 from typing import List, Optional
 
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import TSVECTOR, UUID
 
 from app import db
 from app.utils import PBKDF2PasswordHasher
@@ -118,16 +118,52 @@ class Subtitle(BaseModel):
 
     id = db.Column(db.Integer, db.Sequence("line_id_seq"), primary_key=True)
     line = db.Column(db.Text, nullable=False)
-    time = db.Column(db.Integer)  # time as seconds
+    time = db.Column(db.Integer)  # start time as milliseconds
+    end_time = db.Column(db.Integer)  # end time as milliseconds
     content_id = db.Column(db.Integer, db.ForeignKey("content.id"), nullable=False)
+    # Lexemes of English line for full text search, maintained by Postgres
+    line_tsv = db.Column(
+        TSVECTOR, db.Computed("to_tsvector('english', line)", persisted=True)
+    )
+    # Kept by services. Translations other than rejected ones are counted
+    like_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    translation_count = db.Column(
+        db.Integer, nullable=False, default=0, server_default="0"
+    )
 
     _id_idx = db.Index("line_idx_id", "id")
     _line_idx = db.Index("line_idx_line", "line")
+    # Serves ILIKE, regex and similarity search. Requires pg_trgm
+    _line_trgm_idx = db.Index(
+        "line_idx_line_trgm",
+        "line",
+        postgresql_using="gin",
+        postgresql_ops={"line": "gin_trgm_ops"},
+    )
+    _line_tsv_idx = db.Index("line_idx_line_tsv", "line_tsv", postgresql_using="gin")
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
 
 
+class Suggestion(BaseModel):
+    """Phrases of English lines for search-as-you-type, built by `build-suggestions`"""
+
+    __tablename__ = "suggestion"
+
+    phrase = db.Column(db.Text, primary_key=True)
+    frequency = db.Column(db.Integer, nullable=False)
+
+    # Long prefixes are found by phrase, and short ones by walking the most
+    # frequent phrases. LIKE 'prefix%' is served regardless of collation
+    _phrase_pattern_idx = db.Index(
+        "suggestion_idx_phrase_pattern",
+        "phrase",
+        postgresql_ops={"phrase": "text_pattern_ops"},
+    )
+    _frequency_idx = db.Index("suggestion_idx_frequency", "frequency")
+
+
 class SubtitleLike(TimeStampedModel):
 
     __tablename__ = "line_like"
@@ -151,9 +187,23 @@ class Translation(TimeStampedModel):
         db.Integer, db.ForeignKey("subtitle.id", ondelete="CASCADE"), nullable=False
     )
     user_id = db.Column(UUID, db.ForeignKey("user.id", ondelete="CASCADE"))
+    # Kept by services
+    like_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
 
     _id_idx = db.Index("translation_idx_id", "id")
     _translation_idx = db.Index("translation_idx_translation", "translation")
+    _line_id_idx = db.Index("translation_idx_line_id", "line_id")
+
+
+# Korean search. Every two characters of approved translations are indexed,
+# since Korean words are too short for trigrams and can't be stemmed by Postgres.
+# text_bigrams and statistics on it are created by migration
+db.Index(
+    "translation_idx_translation_bigrams",
+    db.func.text_bigrams(Translation.translation),
+    postgresql_using="gin",
+    postgresql_where=Translation.status == "APPROVED",
+)
 
 
 class TranslationLike(TimeStampedModel):
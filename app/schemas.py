@@ -15,6 +15,20 @@ class TranslationReviewStatus(str, Enum):
     change_requested = "CHANGE_REQUESTED"
 
 
+class SearchMode(str, Enum):
+    regex = "regex"
+    contains = "contains"
+    prefix = "prefix"
+    word = "word"
+    similar = "similar"
+    fulltext = "fulltext"
+
+
+class SubtitleMatchMode(str, Enum):
+    start = "start"
+    overlap = "overlap"
+
+
 class UserModel(BaseModel):
     id: UUID = ...
     email: str = ...
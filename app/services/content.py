@@ -1,7 +1,8 @@
 from typing import List, Dict, Any, Optional
 
 from app import db
-from app.models import Content, Genre, ContentXGenre
+from app.models import Content, ContentXGenre
+from app.services import genre as genre_service
 
 
 async def fetch(limit: int, cursor: Optional[int] = None) -> List[Dict[str, Any]]:
@@ -26,18 +27,13 @@ async def get_by_id(content_id: int) -> Content:
 
 
 async def fetch_genres(content_ids: List[int]) -> Dict[str, Dict[str, Any]]:
-    """get genres of each content"""
-    query = (
-        db.select([Genre.id, Genre.genre, ContentXGenre.content_id])
-        .select_from(Genre.join(ContentXGenre))
-        .where(ContentXGenre.content_id.in_(content_ids))
-    )
-    data = await query.gino.all()
-    genres: dict = {}
-    for each in data:
-        content = genres.setdefault(each[2], [])
-        content.append({"id": each[0], "name": each[1]})
-    return genres
+    """get genres of each content, from `genre_service.catalog`"""
+    content_genres = (await genre_service.catalog.get())["content_genres"]
+    return {
+        content_id: content_genres[content_id]
+        for content_id in content_ids
+        if content_id in content_genres
+    }
 
 
 async def add_genres(content: Content, genre_ids: List[int]) -> None:
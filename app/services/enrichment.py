@@ -0,0 +1,157 @@
+"""
+Counts, genres and likes listed with lines and translations
+
+Counts are kept on subtitle and translation rows, and likes of the user are
+checked by a subquery, so a page is enriched in a single query by primary keys.
+Genres come from `genre_service.catalog`, and likes not written yet from
+`like_service`.
+"""
+from typing import List, Dict, Any, Optional
+from uuid import UUID
+
+from app import db
+from app.models import (
+    Subtitle,
+    Translation,
+    SubtitleLike,
+    TranslationLike,
+)
+from app.services import content as content_service
+from app.services import like as like_service
+from app.utils import fetch_all
+
+
+# Of rows deleted since they were listed, or cached in other workers
+_MISSING = {"like_count": 0, "translation_count": 0, "user_liked": False}
+
+
+def merge(
+    rows: List[Dict[str, Any]],
+    extra: List[Dict[str, Any]],
+    genres: Dict[int, List[Dict[str, Any]]],
+) -> List[Dict[str, Any]]:
+    """Add genres by `content_id`, and counts and `user_liked` of `extra` by `id`"""
+    by_id = {each["id"]: each for each in extra}
+    data = []
+    for row in rows:
+        each = by_id.get(row["id"], _MISSING)
+        data.append(
+            {
+                **row,
+                "genres": genres.get(row["content_id"], []),
+                "like_count": each["like_count"],
+                "translation_count": each["translation_count"],
+                "user_liked": each["user_liked"],
+            }
+        )
+    return data
+
+
+async def _merge(
+    rows: List[Dict[str, Any]], extra: List[Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    genres = await content_service.fetch_genres([each["content_id"] for each in rows])
+    return merge(rows, extra, genres)
+
+
+async def enrich_lines(
+    lines: List[Dict[str, Any]], user_id: Optional[UUID] = None
+) -> List[Dict[str, Any]]:
+    """Add genres, like_count, translation_count and user_liked to lines
+
+    Args:
+        lines: dicts with the line id as `id` and `content_id`
+        user_id: user whose likes are checked. `user_liked` is false without it
+    """
+    if not lines:
+        return []
+
+    if user_id:
+        user_liked = (
+            db.exists()
+            .where(
+                db.and_(
+                    SubtitleLike.line_id == Subtitle.id,
+                    SubtitleLike.user_id == user_id,
+                )
+            )
+            .label("user_liked")
+        )
+    else:
+        user_liked = db.false().label("user_liked")
+
+    query = db.select(
+        [
+            Subtitle.id,
+            Subtitle.like_count,
+            Subtitle.translation_count,
+            user_liked,
+        ]
+    ).where(Subtitle.id.in_([each["id"] for each in lines]))
+    data = await _merge(lines, await fetch_all(query))
+    return like_service.overlay(like_service.line_likes, data, user_id)
+
+
+async def enrich_translations(
+    translations: List[Dict[str, Any]], user_id: Optional[UUID] = None
+) -> List[Dict[str, Any]]:
+    """Add genres, like_count, translation_count and user_liked to translations
+
+    `translation_count` is the count of translations of the line.
+
+    Args:
+        translations: dicts with the translation id as `id` and `content_id`
+        user_id: user whose likes are checked. `user_liked` is false without it
+    """
+    if not translations:
+        return []
+
+    if user_id:
+        user_liked = (
+            db.exists()
+            .where(
+                db.and_(
+                    TranslationLike.translation_id == Translation.id,
+                    TranslationLike.user_id == user_id,
+                )
+            )
+            .label("user_liked")
+        )
+    else:
+        user_liked = db.false().label("user_liked")
+
+    query = (
+        db.select(
+            [
+                Translation.id,
+                Translation.like_count,
+                Subtitle.translation_count,
+                user_liked,
+            ]
+        )
+        .select_from(Translation.join(Subtitle, Translation.line_id == Subtitle.id))
+        .where(Translation.id.in_([each["id"] for each in translations]))
+    )
+    data = await _merge(translations, await fetch_all(query))
+    return like_service.overlay(like_service.translation_likes, data, user_id)
+
+
+async def mark_user_liked(
+    lines: List[Dict[str, Any]], user_id: Optional[UUID]
+) -> List[Dict[str, Any]]:
+    """Set `user_liked` of lines enriched without a user
+
+    Lines are copied, not updated in place.
+    """
+    if not user_id or not lines:
+        return lines
+
+    query = db.select([SubtitleLike.line_id]).where(
+        db.and_(
+            SubtitleLike.user_id == user_id,
+            SubtitleLike.line_id.in_([each["id"] for each in lines]),
+        )
+    )
+    liked = {each[0] for each in await query.gino.all()}
+    data = [{**each, "user_liked": each["id"] in liked} for each in lines]
+    return like_service.overlay(like_service.line_likes, data, user_id)
@@ -0,0 +1,33 @@
+"""
+Home feed
+
+Randomly picked and enriched lines are kept in `pool`, which the app reloads in
+the background. Counts and genres of the feed may lag behind by
+`FEED_REFRESH_INTERVAL`, while `user_liked` is read on every request.
+"""
+from typing import List, Dict, Any, Optional
+from uuid import UUID
+
+from app import config
+from app.core.feed import FeedPool
+from app.services import enrichment as enrichment_service
+from app.services import subtitle as subtitle_service
+
+
+async def _load() -> List[Dict[str, Any]]:
+    lines = await subtitle_service.pick_randomly(config.FEED_POOL_SIZE)
+    return await enrichment_service.enrich_lines(lines)
+
+
+pool = FeedPool(_load, config.FEED_REFRESH_INTERVAL)
+
+
+async def pick(count: int, user_id: Optional[UUID] = None) -> List[Dict[str, Any]]:
+    """Pick enriched lines randomly
+
+    Lines come from `pool`, or from the database until the pool is loaded.
+    """
+    if not pool.ready:
+        lines = await subtitle_service.pick_randomly(count)
+        return await enrichment_service.enrich_lines(lines, user_id)
+    return await enrichment_service.mark_user_liked(pool.sample(count), user_id)
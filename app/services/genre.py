@@ -1,12 +1,32 @@
 from typing import List, Dict, Any
 
-from app.models import Genre
+from app import config, db
+from app.core.cache import SnapshotCache
+from app.models import Genre, ContentXGenre
+
+
+async def _load_catalog() -> Dict[str, Any]:
+    genres = await Genre.query.order_by(Genre.id).gino.all()
+    names = {each.id: {"id": each.id, "name": each.genre} for each in genres}
+    content_genres: Dict[int, List[Dict[str, Any]]] = {}
+    query = db.select([ContentXGenre.content_id, ContentXGenre.genre_id]).order_by(
+        ContentXGenre.genre_id
+    )
+    for content_id, genre_id in await query.gino.all():
+        content_genres.setdefault(content_id, []).append(names[genre_id])
+    return {
+        "genres": [each.to_dict() for each in genres],
+        "content_genres": content_genres,
+    }
+
+
+# Every genre and genres of each content. Invalidated when they are edited
+catalog = SnapshotCache("genre_catalog", _load_catalog, config.GENRE_CACHE_TTL)
 
 
 async def fetch_all() -> List[Dict[str, Any]]:
     """Fetch all genres"""
-    data = await Genre.query.gino.all()
-    return [each.to_dict() for each in data]
+    return (await catalog.get())["genres"]
 
 
 async def get_by_id(genre_id: int) -> Genre:
@@ -0,0 +1,104 @@
+"""
+Write-behind likes
+
+With `LIKE_WRITE_BEHIND`, likes and unlikes of lines and translations are
+acknowledged at once and kept in `line_likes` and `translation_likes` by
+(user id, target id). Repeated toggles of a key are coalesced, and the last
+one is written with the others every `LIKE_FLUSH_INTERVAL` seconds in a few
+bulk statements. `overlay` shows users their own toggles until then.
+
+Buffers live in each worker, so only the worker that took a toggle sees it
+before it is written.
+"""
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from app import config, db
+from app.core.buffer import WriteBehindBuffer
+from app.models import Subtitle, SubtitleLike, Translation, TranslationLike
+
+_INSERT = """
+INSERT INTO {like} (user_id, {target})
+SELECT toggle.user_id, toggle.target_id
+FROM unnest(CAST(:user_ids AS uuid[]), CAST(:target_ids AS int[]))
+    AS toggle (user_id, target_id)
+JOIN {counted} ON {counted}.id = toggle.target_id
+JOIN "user" ON "user".id = toggle.user_id
+ON CONFLICT DO NOTHING
+RETURNING {target}
+"""
+
+_DELETE = """
+DELETE FROM {like}
+USING unnest(CAST(:user_ids AS uuid[]), CAST(:target_ids AS int[]))
+    AS toggle (user_id, target_id)
+WHERE {like}.user_id = toggle.user_id AND {like}.{target} = toggle.target_id
+RETURNING {like}.{target}
+"""
+
+_COUNT = """
+UPDATE {counted} SET like_count = like_count + delta.delta
+FROM unnest(CAST(:target_ids AS int[]), CAST(:deltas AS int[])) AS delta (id, delta)
+WHERE {counted}.id = delta.id
+"""
+
+
+def _writer(like, target: str, counted):
+    """Write toggles of a like table, and like counts of its targets"""
+    names = dict(like=like.__tablename__, target=target, counted=counted.__tablename__)
+
+    async def write(toggles: Dict[Tuple[str, int], bool]) -> None:
+        liked = [key for key, value in toggles.items() if value]
+        unliked = [key for key, value in toggles.items() if not value]
+        deltas: Counter = Counter()
+        async with db.transaction():
+            for keys, statement, delta in ((liked, _INSERT, 1), (unliked, _DELETE, -1)):
+                if not keys:
+                    continue
+                user_ids, target_ids = zip(*keys)
+                rows = await db.all(
+                    db.text(statement.format(**names)),
+                    user_ids=list(user_ids),
+                    target_ids=list(target_ids),
+                )
+                for (target_id,) in rows:
+                    deltas[target_id] += delta
+            changed = {key: value for key, value in deltas.items() if value}
+            if changed:
+                await db.status(
+                    db.text(_COUNT.format(**names)),
+                    target_ids=list(changed),
+                    deltas=list(changed.values()),
+                )
+
+    return write
+
+
+line_likes = WriteBehindBuffer(
+    _writer(SubtitleLike, "line_id", Subtitle), config.LIKE_FLUSH_INTERVAL
+)
+translation_likes = WriteBehindBuffer(
+    _writer(TranslationLike, "translation_id", Translation),
+    config.LIKE_FLUSH_INTERVAL,
+)
+
+
+def toggle(
+    buffer: WriteBehindBuffer, user_id: UUID, target_id: int, liked: bool
+) -> None:
+    """Like or unlike later"""
+    buffer.set((str(user_id), target_id), liked)
+
+
+def overlay(
+    buffer: WriteBehindBuffer, items: List[Dict[str, Any]], user_id: Optional[UUID]
+) -> List[Dict[str, Any]]:
+    """Set `user_liked` of items by `id` to toggles of the user not written yet"""
+    if not user_id or not len(buffer):
+        return items
+    data = []
+    for each in items:
+        liked = buffer.get((str(user_id), each["id"]))
+        data.append(each if liked is None else {**each, "user_liked": liked})
+    return data
@@ -0,0 +1,158 @@
+from typing import List, Dict, Any, Optional, Tuple
+
+from app import config, db
+from app.core.cache import TTLCache
+from app.models import Subtitle, Translation, Content
+from app.services import subtitle as subtitle_service
+from app.services import translation as translation_service
+from app.utils import count_rows, fetch_all, normalize_keyword
+
+_count_cache = TTLCache(config.SEARCH_COUNT_CACHE_SIZE, config.SEARCH_COUNT_TTL)
+
+
+def _matches(
+    english: Optional[str],
+    korean: Optional[str],
+    mode: str,
+    cursor: Optional[int] = None,
+    limit: Optional[int] = None,
+):
+    """
+    Build UNION ALL of lines matching the English or the Korean keyword
+    Rows are (line_id, translation_id, english, korean), where translation_id
+    is the latest matched translation of the line.
+    With `limit`, each side takes only its last lines before `cursor`, which is
+    enough to find a page of `limit` lines.
+    """
+    subqueries = []
+    if english:
+        conditions = [subtitle_service.match(english, mode)]
+        if cursor:
+            conditions.append(Subtitle.id < cursor)
+        query = db.select(
+            [
+                Subtitle.id.label("line_id"),
+                db.cast(db.null(), db.Integer).label("translation_id"),
+                db.true().label("english"),
+                db.false().label("korean"),
+            ]
+        ).where(db.and_(*conditions))
+        if limit:
+            query = query.order_by(Subtitle.id.desc()).limit(limit)
+        subqueries.append(query)
+    if korean:
+        conditions = [translation_service.match(korean)]
+        if cursor:
+            conditions.append(Translation.line_id < cursor)
+        query = (
+            db.select(
+                [
+                    Translation.line_id,
+                    db.func.max(Translation.id).label("translation_id"),
+                    db.false().label("english"),
+                    db.true().label("korean"),
+                ]
+            )
+            .where(db.and_(*conditions))
+            .group_by(Translation.line_id)
+        )
+        if limit:
+            query = query.order_by(Translation.line_id.desc()).limit(limit)
+        subqueries.append(query)
+    # Limited subqueries are grouped in parentheses, which hides their bind
+    return db.union_all(*subqueries, bind=db.bind).alias("matches")
+
+
+async def search(
+    english: Optional[str],
+    korean: Optional[str],
+    limit: int = 20,
+    cursor: Optional[int] = None,
+    mode: str = "regex",
+) -> List[Dict[str, Any]]:
+    """Search lines whose English or approved Korean matches a keyword
+
+    Both keywords are matched in one statement, a UNION ALL of the subqueries
+    `subtitle.search` and `translation.search` would run, and lines are
+    ordered by id like them. `cursor` is the id of the last line.
+
+    Args:
+        mode: how to match the English keyword. See `subtitle.search`.
+            Korean is matched like `translation.search`
+
+    Returns:
+        lines with the latest matched translation, and which keywords matched
+    """
+    english = english and normalize_keyword(english, mode)
+    korean = korean and normalize_keyword(korean)
+    matches = _matches(english, korean, mode, cursor, limit)
+    page = (
+        db.select(
+            [
+                matches.c.line_id,
+                db.func.max(matches.c.translation_id).label("translation_id"),
+                db.func.bool_or(matches.c.english).label("english"),
+                db.func.bool_or(matches.c.korean).label("korean"),
+            ]
+        )
+        .group_by(matches.c.line_id)
+        .order_by(matches.c.line_id.desc())
+        .limit(limit)
+        .alias("page")
+    )
+
+    query = (
+        db.select(
+            [
+                Subtitle.id,
+                Subtitle.line,
+                Subtitle.time,
+                Translation.id.label("translation_id"),
+                Translation.translation,
+                Content.id.label("content_id"),
+                Content.title.label("content_title"),
+                Content.year.label("content_year"),
+                page.c.english.label("english_matched"),
+                page.c.korean.label("korean_matched"),
+            ]
+        )
+        .select_from(
+            page.join(Subtitle, Subtitle.id == page.c.line_id)
+            .join(Content, Subtitle.content_id == Content.id)
+            .outerjoin(Translation, Translation.id == page.c.translation_id)
+        )
+        .order_by(Subtitle.id.desc())
+    )
+
+    data = await fetch_all(query)
+    return data
+
+
+async def count(
+    english: Optional[str],
+    korean: Optional[str],
+    mode: str = "regex",
+    strategy: Optional[str] = None,
+) -> Tuple[int, bool]:
+    """Count lines matching either keyword
+
+    Args:
+        strategy: see `app.utils.count_rows`. `BILINGUAL_SEARCH_COUNT` by default
+
+    Returns:
+        (count, whether the count is exact)
+    """
+    english = english and normalize_keyword(english, mode)
+    korean = korean and normalize_keyword(korean)
+    strategy = strategy or config.BILINGUAL_SEARCH_COUNT
+    # A side with more lines than the cap is enough to exceed it
+    limit = config.SEARCH_COUNT_CAP + 1 if strategy == "capped" else None
+    matches = _matches(english, korean, mode, limit=limit)
+    lines = db.select([matches.c.line_id]).group_by(matches.c.line_id)
+    return await count_rows(
+        lines,
+        strategy,
+        cap=config.SEARCH_COUNT_CAP,
+        cache=_count_cache,
+        cache_key=(mode, english, korean),
+    )
@@ -1,7 +1,13 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from uuid import UUID
+import random
 
-from app import db
+from sqlalchemy.dialects.postgresql import ARRAY
+
+from app import config, db
+from app.core.cache import ResultCache, TTLCache
+from app.core.pagination import paginate, split_page
+from app.core.regex import check_regex
 from app.models import (
     User,
     Subtitle,
@@ -9,12 +15,60 @@ from app.models import (
     Content,
     SubtitleLike,
 )
-from app.utils import fetch_all
+from app.utils import count_rows, fetch_all, match_keyword, normalize_keyword
+
+_count_cache = TTLCache(config.SEARCH_COUNT_CACHE_SIZE, config.SEARCH_COUNT_TTL)
+search_cache = ResultCache(
+    "subtitle_search", config.SEARCH_CACHE_SIZE, config.SEARCH_CACHE_TTL
+)
+
+# `pick_randomly` probes this many times of the lines still to pick, in at most
+# PICK_ROUNDS queries
+PICK_OVERSAMPLING = 2
+PICK_ROUNDS = 3
+
+
+def match(keyword: str, mode: str):
+    """Match English lines with a keyword. See `search` for modes"""
+    if mode == "fulltext":
+        return Subtitle.line_tsv.op("@@")(_tsquery(keyword))
+    if mode == "regex":
+        check_regex(keyword)
+    return match_keyword(Subtitle.line, keyword, mode)
+
+
+def _tsquery(keyword: str):
+    """Parse keyword like a web search engine (quotes, or, -)"""
+    return db.func.websearch_to_tsquery(db.literal_column("'english'"), keyword)
+
+
+async def search(
+    keyword: str, limit: int = 20, cursor: Optional[int] = None, mode: str = "regex"
+):
+    """Search English with a keyword
+
+    Pages are cached in `search_cache` until subtitles or contents change.
+
+    Args:
+        mode: how to match the keyword. See `app.utils.match_keyword`.
+            `fulltext` matches word forms and orders lines by relevance
+    """
+    keyword = normalize_keyword(keyword, mode)
+    version = search_cache.version
+    data = await search_cache.get(mode, keyword, cursor, limit)
+    if data is None:
+        if mode == "fulltext":
+            data = await _search_fulltext(keyword, limit, cursor)
+        else:
+            data = await _search(keyword, limit, cursor, mode)
+        await search_cache.set(
+            mode, keyword, cursor, limit, value=data, version=version
+        )
+    return data
 
 
-async def search(keyword: str, limit: int = 20, cursor: Optional[int] = None):
-    """Search English with a keyword"""
-    conditions = [Subtitle.line.op("~*")(keyword)]
+async def _search(keyword: str, limit: int, cursor: Optional[int], mode: str):
+    conditions = [match(keyword, mode)]
     if cursor:
         conditions.append(Subtitle.id < cursor)
 
@@ -39,61 +93,219 @@ async def search(keyword: str, limit: int = 20, cursor: Optional[int] = None):
     return data
 
 
-async def count(keyword: str) -> int:
-    """Count subtitles"""
-    query = db.select([db.func.count(Subtitle.id)]).where(
-        Subtitle.line.op("~*")(keyword)
-    )
-    return await query.gino.scalar()
-
-
-async def pick_randomly(max_count=30) -> List[Optional[Dict[str, Any]]]:
-    """Pick subtitles randomly
-
-    Args:
-        max_count: maximum length of subtitles to pick
+async def _search_fulltext(keyword: str, limit: int, cursor: Optional[int]):
     """
-    total_count = await db.select([db.func.count(Subtitle.id)]).gino.scalar()
-    if total_count == 0:
-        return []
+    Search English lines by lexemes, most relevant first
+    Lines are ordered by (rank, id), and `cursor` is still the id of the last line
+    of the previous page: the page continues after the rank of that line.
+    """
+    rank = db.func.ts_rank(Subtitle.line_tsv, _tsquery(keyword))
+    conditions = [match(keyword, "fulltext")]
+    if cursor:
+        cursor_line = Subtitle.alias()
+        cursor_rank = (
+            db.select([db.func.ts_rank(cursor_line.line_tsv, _tsquery(keyword))])
+            .where(cursor_line.id == cursor)
+            .as_scalar()
+        )
+        conditions.append(db.tuple_(rank, Subtitle.id) < db.tuple_(cursor_rank, cursor))
 
-    percentage = max_count / total_count
     query = (
         db.select(
             [
                 Subtitle.id,
                 Subtitle.line,
                 Subtitle.time,
-                Translation.id.label("translation_id"),
-                Translation.translation.label("translation"),
                 Content.id.label("content_id"),
                 Content.title.label("content_title"),
                 Content.year.label("content_year"),
-            ],
-            distinct=Subtitle.id,
-        )
-        .select_from(
-            Subtitle.join(Content, Subtitle.content_id == Content.id).join(
-                Translation, Subtitle.id == Translation.line_id
-            )
+                db.func.ts_headline(
+                    db.literal_column("'english'"),
+                    Subtitle.line,
+                    _tsquery(keyword),
+                    "HighlightAll=true",
+                ).label("headline"),
+            ]
         )
-        .where(db.func.random() < percentage)
+        .where(db.and_(*conditions))
+        .select_from(Subtitle.join(Content, Subtitle.content_id == Content.id))
+        .limit(limit)
+        .order_by(rank.desc(), Subtitle.id.desc())
     )
 
     data = await fetch_all(query)
     return data
 
 
+async def count(
+    keyword: str, mode: str = "regex", strategy: Optional[str] = None
+) -> Tuple[int, bool]:
+    """Count subtitles
+
+    Args:
+        strategy: see `app.utils.count_rows`. `SUBTITLE_SEARCH_COUNT` by default
+
+    Returns:
+        (count, whether the count is exact)
+    """
+    keyword = normalize_keyword(keyword, mode)
+    query = db.select([Subtitle.id]).where(match(keyword, mode))
+    return await count_rows(
+        query,
+        strategy or config.SUBTITLE_SEARCH_COUNT,
+        cap=config.SEARCH_COUNT_CAP,
+        cache=_count_cache,
+        cache_key=(mode, keyword),
+    )
+
+
+async def pick_randomly(max_count=30) -> List[Optional[Dict[str, Any]]]:
+    """Pick translated subtitles randomly
+
+    Random ids in the range of translation ids are probed through the primary key,
+    and each probe picks the line of the first translation from it. The cost
+    depends on `max_count`, not on the size of tables. Lines with more translations
+    or right after deleted ones are a little more likely to be picked.
+
+    Args:
+        max_count: count of subtitles to pick. Fewer are picked only when
+            probes keep hitting the same lines, as in a small table
+    """
+    lowest, highest = await db.select(
+        [db.func.min(Translation.id), db.func.max(Translation.id)]
+    ).gino.first()
+    if lowest is None:
+        return []
+
+    picked: Dict[int, Dict[str, Any]] = {}
+    for _ in range(PICK_ROUNDS):
+        probes = [
+            random.randint(lowest, highest)
+            for _ in range(PICK_OVERSAMPLING * (max_count - len(picked)))
+        ]
+        lines = await fetch_all(_pick_by_translation_ids(probes))
+        random.shuffle(lines)
+        for each in lines:
+            picked.setdefault(each["id"], each)
+        if len(picked) >= max_count:
+            break
+    return list(picked.values())[:max_count]
+
+
+def _pick_by_translation_ids(translation_ids: List[int]):
+    """Lines of the first translations from each of translation ids"""
+    probe = db.select(
+        [db.func.unnest(db.cast(translation_ids, ARRAY(db.Integer))).label("id")]
+    ).alias("probe")
+    picked = (
+        db.select([Translation.id, Translation.translation, Translation.line_id])
+        .where(Translation.id >= probe.c.id)
+        .order_by(Translation.id)
+        .limit(1)
+        .lateral("picked")
+    )
+    return db.select(
+        [
+            Subtitle.id,
+            Subtitle.line,
+            Subtitle.time,
+            picked.c.id.label("translation_id"),
+            picked.c.translation.label("translation"),
+            Content.id.label("content_id"),
+            Content.title.label("content_title"),
+            Content.year.label("content_year"),
+        ],
+        distinct=Subtitle.id,
+    ).select_from(
+        probe.join(picked, db.true())
+        .join(Subtitle, Subtitle.id == picked.c.line_id)
+        .join(Content, Subtitle.content_id == Content.id)
+    )
+
+
 async def add_like(line_id: int, user_id: UUID) -> SubtitleLike:
-    like = SubtitleLike(line_id=line_id, user_id=user_id)
-    await like.create()
+    async with db.transaction():
+        like = SubtitleLike(line_id=line_id, user_id=user_id)
+        await like.create()
+        await _add_like_count(line_id, 1)
     return like
 
 
 async def remove_like(line_id: int, user_id: UUID) -> None:
-    await SubtitleLike.delete.where(
-        db.and_(SubtitleLike.line_id == line_id, SubtitleLike.user_id == user_id)
-    ).gino.status()
+    async with db.transaction():
+        removed = (
+            await SubtitleLike.delete.where(
+                db.and_(
+                    SubtitleLike.line_id == line_id, SubtitleLike.user_id == user_id
+                )
+            )
+            .returning(SubtitleLike.id)
+            .gino.all()
+        )
+        await _add_like_count(line_id, -len(removed))
+
+
+async def _add_like_count(line_id: int, delta: int) -> None:
+    if delta:
+        await Subtitle.update.values(like_count=Subtitle.like_count + delta).where(
+            Subtitle.id == line_id
+        ).gino.status()
+
+
+async def add_translation_count(line_id: int, delta: int) -> None:
+    """Add to the count of translations of a line, in the transaction of the change"""
+    if delta:
+        await Subtitle.update.values(
+            translation_count=Subtitle.translation_count + delta
+        ).where(Subtitle.id == line_id).gino.status()
+
+
+async def count_translations(line_id: int) -> int:
+    """Count translations of a line other than rejected ones"""
+    query = db.select([Subtitle.translation_count]).where(Subtitle.id == line_id)
+    return await query.gino.scalar() or 0
+
+
+async def recount(line_ids: Optional[List[int]] = None) -> int:
+    """Count likes and translations of lines again, to repair drifted counts
+
+    Args:
+        line_ids: lines to recount. Every line by default
+
+    Returns:
+        count of lines repaired
+    """
+    like_count = (
+        db.select([db.func.count()])
+        .where(SubtitleLike.line_id == Subtitle.id)
+        .as_scalar()
+    )
+    translation_count = (
+        db.select([db.func.count()])
+        .where(
+            db.and_(
+                Translation.line_id == Subtitle.id, Translation.status != "REJECTED"
+            )
+        )
+        .as_scalar()
+    )
+    conditions = [
+        db.or_(
+            Subtitle.like_count != like_count,
+            Subtitle.translation_count != translation_count,
+        )
+    ]
+    if line_ids is not None:
+        conditions.append(Subtitle.id.in_(line_ids))
+
+    status, _ = (
+        await Subtitle.update.values(
+            like_count=like_count, translation_count=translation_count
+        )
+        .where(db.and_(*conditions))
+        .gino.status()
+    )
+    return int(status.split()[-1])
 
 
 async def fetch_user_liked(
@@ -130,45 +342,17 @@ async def fetch_user_liked(
     return data
 
 
-async def fetch_translation_count(line_ids: List[int]) -> Dict[int, int]:
-    """Get translation_count"""
-    query = (
-        db.select([Translation.line_id, db.func.count(Translation.line_id)])
-        .where(
-            db.and_(Translation.line_id.in_(line_ids), Translation.status != "REJECTED")
-        )
-        .group_by(Translation.line_id)
-    )
-    data = await query.gino.all()
-    translation_count_per_line = {each[0]: each[1] for each in data}
-    return translation_count_per_line
-
-
-async def fetch_like_count(line_ids: List[int]) -> Dict[int, int]:
-    """get like count per subtitle"""
-    query = (
-        db.select([SubtitleLike.line_id, db.func.count(SubtitleLike.line_id)])
-        .where(SubtitleLike.line_id.in_(line_ids))
-        .group_by(SubtitleLike.line_id)
-    )
-
-    data = await query.gino.all()
-    return {each[0]: each[1] for each in data}
-
-
-async def pick_user_liked(user_id: UUID, line_ids: List[int]) -> List[int]:
-    """Pick user-liked subtitles"""
-    query = db.select([SubtitleLike.line_id]).where(
-        db.and_(SubtitleLike.user_id == user_id, SubtitleLike.line_id.in_(line_ids))
-    )
-    data = await query.gino.all()
-    return [each[0] for each in data]
-
-
 async def fetch_translations(
-    line_id: int, status: Optional[List[str]], limit: int = 15, offset: int = 0,
-) -> List[Dict[str, Any]]:
-    """Fetch translations for give lines"""
+    line_id: int,
+    status: Optional[List[str]],
+    limit: int = 15,
+    cursor: Optional[str] = None,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Fetch translations for give lines, oldest first
+
+    Returns:
+        (translations, cursor of the next page)
+    """
     conditions = [
         Translation.line_id == line_id,
     ]
@@ -176,13 +360,17 @@ async def fetch_translations(
     if status:
         conditions.append(Translation.status.in_(status))
 
-    query = (
-        Translation.load(user=User.on(Translation.user_id == User.id))
-        .query.where(db.and_(*conditions))
-        .limit(limit)
-        .offset(offset)
+    keys = (Translation.created_at, Translation.id)
+    query = paginate(
+        Translation.load(user=User.on(Translation.user_id == User.id)).query.where(
+            db.and_(*conditions)
+        ),
+        keys,
+        cursor,
+        limit,
+        descending=False,
     )
-    data = await query.gino.all()
+    data, next_cursor = split_page(await query.gino.all(), keys, limit)
     translations = []
     for each in data:
         try:
@@ -190,7 +378,7 @@ async def fetch_translations(
         except AttributeError:
             user = {"id": None, "nickname": "자막"}
         translations.append({**each.to_dict(hide=["user_id"]), "user": user})
-    return translations
+    return translations, next_cursor
 
 
 async def fetch_by_content_id(
@@ -210,6 +398,7 @@ async def fetch_by_content_id(
                 Subtitle.id,
                 Subtitle.line,
                 Subtitle.time,
+                Subtitle.end_time,
                 Translation.id.label("translation_id"),
                 Translation.translation.label("translation"),
                 Content.id.label("content_id"),
@@ -0,0 +1,121 @@
+"""
+Search-as-you-type suggestions
+
+Phrases of 1 to `SUGGESTION_MAX_WORDS` consecutive words of English lines are
+counted into the suggestion table, and a prefix is answered with the most
+frequent phrases starting with it.
+The table lives in Postgres so that workers share it, and rare phrases are
+dropped when it is built to keep it small. Workers only cache answers.
+"""
+from typing import List, Dict, Any
+import re
+
+from app import config, db
+from app.core.cache import ResultCache
+from app.models import Suggestion
+from app.utils import fetch_all
+
+cache = ResultCache(
+    "subtitle_suggest", config.SEARCH_CACHE_SIZE, config.SEARCH_CACHE_TTL
+)
+
+# Words of a line, with contractions like "don't" kept in one word
+WORD_PATTERN = "[a-z0-9]+(?:'[a-z]+)?"
+
+# Phrases of lines matching {where}, with the number of times each appears
+_PHRASES = """
+    WITH line_words AS MATERIALIZED (
+        SELECT ARRAY(
+            SELECT word[1] FROM regexp_matches(lower(line), :word_pattern, 'g') AS word
+        ) AS words
+        FROM subtitle
+        WHERE {where}
+    )
+    SELECT array_to_string(words[i : i + n - 1], ' ') AS phrase, count(*) AS frequency
+    FROM line_words,
+        generate_series(1, cardinality(words)) AS i,
+        generate_series(1, :max_words) AS n
+    WHERE i + n - 1 <= cardinality(words)
+    GROUP BY 1
+"""
+
+
+def normalize_prefix(prefix: str) -> str:
+    """Normalize a prefix like phrases. A trailing space only matches next words"""
+    words = re.findall(WORD_PATTERN, prefix.lower())
+    normalized = " ".join(words)
+    if words and prefix[-1].isspace():
+        normalized += " "
+    return normalized
+
+
+async def build(min_frequency: int = 2) -> int:
+    """Rebuild suggestions from every line
+
+    Suggestions are served from the previous rows until the new ones are committed,
+    as rows are deleted rather than truncated, which would lock out readers.
+
+    Args:
+        min_frequency: phrases appearing fewer times are dropped to keep the table small
+
+    Returns:
+        number of phrases
+    """
+    async with db.transaction():
+        await db.status("DELETE FROM suggestion")
+        await db.status(
+            db.text(
+                "INSERT INTO suggestion (phrase, frequency) "
+                + _PHRASES.format(where="TRUE")
+                + " HAVING count(*) >= :min_frequency"
+            ),
+            word_pattern=WORD_PATTERN,
+            max_words=config.SUGGESTION_MAX_WORDS,
+            min_frequency=min_frequency,
+        )
+    # Reclaims deleted rows. Whether a prefix is served by phrase or by frequency
+    # depends on statistics
+    await db.status("VACUUM ANALYZE suggestion")
+    await cache.invalidate()
+    return await db.select([db.func.count()]).select_from(Suggestion).gino.scalar()
+
+
+async def add_content(content_id: int) -> None:
+    """Count phrases of lines of a content into suggestions
+
+    Phrases are added regardless of `min_frequency` of `build`,
+    which drops the rare ones again.
+    """
+    await db.status(
+        db.text(
+            "INSERT INTO suggestion (phrase, frequency) "
+            + _PHRASES.format(where="content_id = :content_id")
+            + " ON CONFLICT (phrase) DO UPDATE"
+            " SET frequency = suggestion.frequency + excluded.frequency"
+        ),
+        word_pattern=WORD_PATTERN,
+        max_words=config.SUGGESTION_MAX_WORDS,
+        content_id=content_id,
+    )
+    await cache.invalidate()
+
+
+async def suggest(prefix: str, limit: int = 10) -> List[Dict[str, Any]]:
+    """Suggest the most frequent phrases starting with a prefix"""
+    prefix = normalize_prefix(prefix)
+    if not prefix:
+        return []
+
+    version = cache.version
+    data = await cache.get(prefix, limit)
+    if data is None:
+        # Normalized prefixes have no LIKE wildcards to escape
+        query = (
+            db.select([Suggestion.phrase, Suggestion.frequency])
+            .where(Suggestion.phrase.like(f"{prefix}%"))
+            .order_by(Suggestion.frequency.desc(), Suggestion.phrase)
+            .limit(limit)
+        )
+        data = await fetch_all(query)
+        await cache.set(prefix, limit, value=data, version=version)
+    return data
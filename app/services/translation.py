@@ -1,4 +1,4 @@
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from uuid import UUID
 
 from app.models import (
@@ -9,40 +9,83 @@ from app.models import (
     TranslationReview,
     User,
 )
-from app import db
+from app import config, db
+from app.core.cache import ResultCache, TTLCache
+from app.core.pagination import paginate, split_page
+from app.core.regex import check_regex
 from app.schemas import TranslationReviewStatus
-from app.utils import fetch_all
+from app.services import subtitle as subtitle_service
+from app.utils import count_rows, fetch_all, is_literal, normalize_keyword
+
+_count_cache = TTLCache(config.SEARCH_COUNT_CACHE_SIZE, config.SEARCH_COUNT_TTL)
+search_cache = ResultCache(
+    "translation_search", config.SEARCH_CACHE_SIZE, config.SEARCH_CACHE_TTL
+)
+
+
+def match(keyword: str):
+    """Match approved translations with a keyword
+
+    Bigrams of the keyword narrow down translations through
+    `translation_idx_translation_bigrams` before the regex runs on them.
+    """
+    check_regex(keyword)
+    conditions = [
+        Translation.translation.op("~*")(keyword),
+        Translation.status == "APPROVED",
+    ]
+    if is_literal(keyword):
+        conditions.append(
+            db.func.text_bigrams(Translation.translation).op("@>")(
+                db.func.text_bigrams(keyword)
+            )
+        )
+    return db.and_(*conditions)
 
 
 async def fetch(
     status: Optional[List[TranslationReviewStatus]] = None,
     limit: int = 20,
-    offset: int = 0,
-) -> List[Dict[str, Any]]:
-    query = (
-        db.select([Translation, Subtitle.line, User.nickname.label("user_nickname")])
-        .select_from(
-            Translation.join(Subtitle, Translation.line_id == Subtitle.id).join(
-                User, Translation.user_id == User.id, isouter=True
-            )
+    cursor: Optional[str] = None,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Fetch translations, newest first
+
+    Returns:
+        (translations, cursor of the next page)
+    """
+    query = db.select(
+        [Translation, Subtitle.line, User.nickname.label("user_nickname")]
+    ).select_from(
+        Translation.join(Subtitle, Translation.line_id == Subtitle.id).join(
+            User, Translation.user_id == User.id, isouter=True
         )
-        .order_by(Translation.id.desc())
-        .limit(limit)
-        .offset(offset)
     )
     if status:
         query = query.where(Translation.status.in_(status))
 
+    keys = (Translation.id,)
+    query = paginate(query, keys, cursor, limit)
     data = await fetch_all(query)
-    return data
+    return split_page(data, keys, limit)
 
 
 async def search(keyword: str, limit: int = 20, cursor: Optional[int] = None):
-    """Search Korean with a keyword"""
-    conditions = [
-        Translation.translation.op("~*")(keyword),
-        Translation.status == "APPROVED",
-    ]
+    """Search Korean with a keyword
+
+    Pages are cached in `search_cache` until approved translations,
+    their lines or contents change.
+    """
+    keyword = normalize_keyword(keyword)
+    version = search_cache.version
+    data = await search_cache.get(keyword, cursor, limit)
+    if data is None:
+        data = await _search(keyword, limit, cursor)
+        await search_cache.set(keyword, cursor, limit, value=data, version=version)
+    return data
+
+
+async def _search(keyword: str, limit: int, cursor: Optional[int]):
+    conditions = [match(keyword)]
     if cursor:
         conditions.append(Translation.id < cursor)
 
@@ -73,14 +116,24 @@ async def search(keyword: str, limit: int = 20, cursor: Optional[int] = None):
     return data
 
 
-async def count(keyword: str) -> int:
-    """Count translations"""
-    query = db.select([db.func.count(Translation.id)]).where(
-        db.and_(
-            Translation.translation.op("~*")(keyword), Translation.status == "APPROVED"
-        )
+async def count(keyword: str, strategy: Optional[str] = None) -> Tuple[int, bool]:
+    """Count translations
+
+    Args:
+        strategy: see `app.utils.count_rows`. `TRANSLATION_SEARCH_COUNT` by default
+
+    Returns:
+        (count, whether the count is exact)
+    """
+    keyword = normalize_keyword(keyword)
+    query = db.select([Translation.id]).where(match(keyword))
+    return await count_rows(
+        query,
+        strategy or config.TRANSLATION_SEARCH_COUNT,
+        cap=config.SEARCH_COUNT_CAP,
+        cache=_count_cache,
+        cache_key=keyword,
     )
-    return await query.gino.scalar()
 
 
 async def get_by_id(translation_id: int) -> Translation:
@@ -89,6 +142,63 @@ async def get_by_id(translation_id: int) -> Translation:
     return translation
 
 
+def _counted(status: str) -> int:
+    """1 if translations of the status count in `Subtitle.translation_count`"""
+    return 0 if status == "REJECTED" else 1
+
+
+async def _lock(translation_id: int) -> Optional[Translation]:
+    """Get a translation, locked until the end of the transaction"""
+    query = Translation.query.where(Translation.id == translation_id)
+    return await query.with_for_update().gino.first()
+
+
+async def _update_status(locked: Translation, status: str, **values) -> None:
+    """Update a locked translation with its status, and the count of its line"""
+    delta = _counted(status) - _counted(locked.status)
+    await locked.update(status=status, **values).apply()
+    await subtitle_service.add_translation_count(locked.line_id, delta)
+
+
+async def create(
+    line_id: int, translation: str, status: str, user_id: Optional[UUID] = None
+) -> Translation:
+    async with db.transaction():
+        created = await Translation(
+            translation=translation, status=status, line_id=line_id, user_id=user_id
+        ).create()
+        await subtitle_service.add_translation_count(line_id, _counted(status))
+    return created
+
+
+async def create_many(translations: List[Dict[str, Any]]) -> None:
+    """Insert translations at once, such as uploaded ones"""
+    if not translations:
+        return
+    async with db.transaction():
+        await Translation.insert().gino.all(translations)
+        await subtitle_service.recount(
+            list({each["line_id"] for each in translations})
+        )
+
+
+async def update(translation_id: int, translation: str, status: str) -> None:
+    async with db.transaction():
+        locked = await _lock(translation_id)
+        if locked:
+            await _update_status(locked, status, translation=translation)
+
+
+async def delete(translation_id: int) -> None:
+    async with db.transaction():
+        translation = await _lock(translation_id)
+        if translation:
+            await translation.delete()
+            await subtitle_service.add_translation_count(
+                translation.line_id, -_counted(translation.status)
+            )
+
+
 async def fetch_user_liked(
     user_id: UUID, limit: int = 20, cursor: Optional[int] = None
 ) -> List[Dict[str, Any]]:
@@ -158,34 +268,59 @@ async def fetch_user_written(
 
 
 async def add_like(translation_id: int, user_id: UUID) -> TranslationLike:
-    like = TranslationLike(translation_id=translation_id, user_id=user_id)
-    await like.create()
+    async with db.transaction():
+        like = TranslationLike(translation_id=translation_id, user_id=user_id)
+        await like.create()
+        await _add_like_count(translation_id, 1)
     return like
 
 
 async def remove_like(translation_id: int, user_id: UUID) -> None:
-    await TranslationLike.delete.where(
-        db.and_(
-            TranslationLike.translation_id == translation_id,
-            TranslationLike.user_id == user_id,
+    async with db.transaction():
+        removed = (
+            await TranslationLike.delete.where(
+                db.and_(
+                    TranslationLike.translation_id == translation_id,
+                    TranslationLike.user_id == user_id,
+                )
+            )
+            .returning(TranslationLike.id)
+            .gino.all()
         )
-    ).gino.status()
+        await _add_like_count(translation_id, -len(removed))
 
 
-async def fetch_like_count(translation_ids: List[int]) -> Dict[int, int]:
-    """get korean count per translation """
-    query = (
-        db.select(
-            [
-                TranslationLike.translation_id,
-                db.func.count(TranslationLike.translation_id),
-            ]
-        )
-        .where(TranslationLike.translation_id.in_(translation_ids))
-        .group_by(TranslationLike.translation_id)
+async def _add_like_count(translation_id: int, delta: int) -> None:
+    if delta:
+        await Translation.update.values(
+            like_count=Translation.like_count + delta
+        ).where(Translation.id == translation_id).gino.status()
+
+
+async def recount(translation_ids: Optional[List[int]] = None) -> int:
+    """Count likes of translations again, to repair drifted counts
+
+    Args:
+        translation_ids: translations to recount. Every translation by default
+
+    Returns:
+        count of translations repaired
+    """
+    like_count = (
+        db.select([db.func.count()])
+        .where(TranslationLike.translation_id == Translation.id)
+        .as_scalar()
     )
-    data = await query.gino.all()
-    return {each[0]: each[1] for each in data}
+    conditions = [Translation.like_count != like_count]
+    if translation_ids is not None:
+        conditions.append(Translation.id.in_(translation_ids))
+
+    status, _ = (
+        await Translation.update.values(like_count=like_count)
+        .where(db.and_(*conditions))
+        .gino.status()
+    )
+    return int(status.split()[-1])
 
 
 async def pick_user_liked(user_id: UUID, translation_ids: List[int]) -> List[int]:
@@ -203,12 +338,10 @@ async def create_review(
     translation_id: int, status: str, reviewer_id: str, message: Optional[str] = None
 ):
     async with db.transaction():
-        translation = await Translation.query.where(
-            Translation.id == translation_id
-        ).gino.first()
+        translation = await _lock(translation_id)
         if not translation:
             raise ValueError("Translation not found")
-        await translation.update(status=status).apply()
+        await _update_status(translation, status)
         await TranslationReview(
             status=status,
             translation=translation.translation,
@@ -216,6 +349,7 @@ async def create_review(
             translation_id=translation.id,
             reviewer_id=reviewer_id,
         ).create()
+    await search_cache.invalidate()
 
 
 async def count_reviews(translation_id: int) -> int:
@@ -227,9 +361,13 @@ async def count_reviews(translation_id: int) -> int:
 
 
 async def fetch_reviews(
-    translation_id: int, limit: int, offset: int = 0
-) -> List[Dict[str, Any]]:
-    """Fetch reviews for a translation"""
+    translation_id: int, limit: int, cursor: Optional[str] = None
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Fetch reviews for a translation, newest first
+
+    Returns:
+        (reviews, cursor of the next page)
+    """
     conditions = [TranslationReview.translation_id == translation_id]
 
     query = (
@@ -238,10 +376,9 @@ async def fetch_reviews(
         .select_from(
             TranslationReview.join(User, TranslationReview.reviewer_id == User.id)
         )
-        .order_by(TranslationReview.id.desc())
-        .limit(limit)
-        .offset(offset)
     )
 
+    keys = (TranslationReview.id,)
+    query = paginate(query, keys, cursor, limit)
     data = await fetch_all(query)
-    return data
+    return split_page(data, keys, limit)
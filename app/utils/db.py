@@ -1,3 +1,13 @@
+from typing import Hashable, Optional, Tuple
+import json
+
+from sqlalchemy import func, literal, select
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+REGEX_METACHARACTERS = frozenset(".^$*+?{}[]\\|()")
+
+
 async def fetch_all(query):
     """
     Fetch data from database in formatted form
@@ -15,3 +25,121 @@ async def fetch_one(query):
     data = await query.gino.first()
     data = {str(col.name): value for col, value in zip(query.columns, data)}
     return data
+
+
+def escape_like(keyword: str, escape: str = "/") -> str:
+    """Escape wildcards of LIKE pattern"""
+    return (
+        keyword.replace(escape, escape * 2)
+        .replace("%", escape + "%")
+        .replace("_", escape + "_")
+    )
+
+
+def escape_regex(keyword: str) -> str:
+    """Escape metacharacters of POSIX regex"""
+    return "".join(
+        "\\" + char if char in REGEX_METACHARACTERS else char for char in keyword
+    )
+
+
+def is_literal(keyword: str) -> bool:
+    """Check if a regex keyword matches only itself"""
+    return not any(char in REGEX_METACHARACTERS for char in keyword)
+
+
+def normalize_keyword(keyword: str, mode: str = "regex") -> str:
+    """
+    Normalize a search keyword so that equivalent searches share cache entries
+    Keywords are lowercased as every search mode ignores case, and whitespace is
+    collapsed except in regex mode, where runs of whitespace can be meant.
+    Regex keywords keep their case for classes like `\\S`.
+    See `match_keyword` for modes.
+    """
+    if mode != "regex":
+        return " ".join(keyword.split()).lower()
+    return keyword.lower() if is_literal(keyword) else keyword
+
+
+def match_keyword(column, keyword: str, mode: str = "regex"):
+    """
+    Build a condition matching a text column with a search keyword
+    Every mode can be served by a pg_trgm GIN index on the column.
+
+    modes:
+        regex: case-insensitive POSIX regular expression (`~*`)
+        contains: case-insensitive substring (`ILIKE '%keyword%'`)
+        prefix: text starting with the keyword (`ILIKE 'keyword%'`)
+        word: keyword as whole words (`~* '\\mkeyword\\M'`)
+        similar: part of text similar to the keyword, which tolerates typos (`<%`)
+
+    Keywords are taken literally except in regex mode.
+    """
+    if mode == "contains":
+        return column.ilike(f"%{escape_like(keyword)}%", escape="/")
+    if mode == "prefix":
+        return column.ilike(f"{escape_like(keyword)}%", escape="/")
+    if mode == "word":
+        return column.op("~*")(f"\\m{escape_regex(keyword)}\\M")
+    if mode == "similar":
+        return literal(keyword).op("<%")(column)
+    if mode == "regex":
+        return column.op("~*")(keyword)
+    raise ValueError(f"Unknown search mode '{mode}'")
+
+
+class Explain(Executable, ClauseElement):
+    """`EXPLAIN (FORMAT JSON)` of a query, which is planned but not run"""
+
+    def __init__(self, query):
+        self.query = query
+
+
+@compiles(Explain, "postgresql")
+def _compile_explain(element, compiler, **kw):
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.query, **kw)
+
+
+COUNT_STRATEGIES = ("exact", "cached", "capped", "estimate")
+
+
+async def count_rows(
+    query,
+    strategy: str = "exact",
+    *,
+    cap: int = 1000,
+    cache=None,
+    cache_key: Optional[Hashable] = None,
+) -> Tuple[int, bool]:
+    """
+    Count rows of a query
+    Counting every match can take as long as scanning the table,
+    so the other strategies trade exactness for a bounded cost.
+
+    strategies:
+        exact: count(*) of the query
+        cached: exact count kept in `cache` under `cache_key` until it expires
+        capped: count up to `cap` rows. Not exact if there are more than `cap`
+        estimate: number of rows the planner expects, without running the query
+
+    Returns:
+        (count, whether the count is exact)
+    """
+    if strategy == "cached":
+        count = cache.get(cache_key)
+        if count is None:
+            count, _ = await count_rows(query, "exact")
+            cache.set(cache_key, count)
+        return count, True
+    if strategy == "capped":
+        count, _ = await count_rows(query.limit(cap + 1), "exact")
+        return min(count, cap), count <= cap
+    if strategy == "estimate":
+        plan = await query.bind.scalar(Explain(query))
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"]), False
+    if strategy == "exact":
+        count = await select([func.count()]).select_from(query.alias()).gino.scalar()
+        return count, True
+    raise ValueError(f"Unknown count strategy '{strategy}'")
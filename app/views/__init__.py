@@ -6,6 +6,8 @@ from .translation_review import blueprint as translation_review_bp
 from .content import blueprint as content_bp
 from .genre import blueprint as genre_bp
 from .file import blueprint as file_bp
+from .search import blueprint as search_bp
+from .cache import blueprint as cache_bp
 
 
 def init_app(app):
@@ -18,3 +20,5 @@ def init_app(app):
     app.blueprint(content_bp)
     app.blueprint(genre_bp)
     app.blueprint(file_bp)
+    app.blueprint(search_bp)
+    app.blueprint(cache_bp)
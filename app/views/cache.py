@@ -0,0 +1,21 @@
+from sanic.request import Request
+from sanic.views import HTTPMethodView
+from sanic.blueprints import Blueprint
+from sanic_jwt_extended.tokens import Token
+
+from app.core.cache import CACHES
+from app.core.sanic_jwt_extended import admin_required
+from app.utils import JsonResponse
+
+blueprint = Blueprint("cache_blueprint", url_prefix="/caches")
+
+
+class CacheStats(HTTPMethodView):
+    @admin_required
+    async def get(self, request: Request, token: Token):
+        """Hit/miss statistics of caches in this worker, by namespace"""
+        data = {namespace: cache.stats() for namespace, cache in CACHES.items()}
+        return JsonResponse({"data": data})
+
+
+blueprint.add_route(CacheStats.as_view(), "")
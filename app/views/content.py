@@ -9,6 +9,10 @@ from app.models import Content
 from app.decorators import expect_query, expect_body
 from app.core.sanic_jwt_extended import admin_required
 from app.services import content as service
+from app.services import subtitle as subtitle_service
+from app.services import translation as translation_service
+from app.services import feed as feed_service
+from app.services import genre as genre_service
 from app.utils import JsonResponse
 from app import db
 
@@ -37,6 +41,7 @@ class ContentList(HTTPMethodView):
                 title=data["title"], year=data["year"], poster=data["poster"]
             ).create()
             await service.add_genres(content, data["genre_ids"])
+        await genre_service.catalog.invalidate()
         return JsonResponse({"message": "success"}, status=201)
 
 
@@ -66,6 +71,10 @@ class ContentDetail(HTTPMethodView):
             ).apply()
             await service.clear_genres(content_id)
             await service.add_genres(content, data["genre_ids"])
+        await subtitle_service.search_cache.invalidate()
+        await translation_service.search_cache.invalidate()
+        await genre_service.catalog.invalidate()
+        feed_service.pool.refresh()
         return JsonResponse({"message": "success"}, status=200)
 
     @admin_required
@@ -74,6 +83,10 @@ class ContentDetail(HTTPMethodView):
         if not content:
             return JsonResponse({"message": "Content not found"}, status=404)
         await content.delete()
+        await subtitle_service.search_cache.invalidate()
+        await translation_service.search_cache.invalidate()
+        await genre_service.catalog.invalidate()
+        feed_service.pool.refresh()
         return JsonResponse({"message": "success"}, status=204)
 
 
@@ -7,6 +7,7 @@ from app.models import Genre
 from app.decorators import expect_body
 from app.core.sanic_jwt_extended import admin_required
 from app.services import genre as service
+from app.services import feed as feed_service
 from app.utils import JsonResponse
 
 blueprint = Blueprint("genre_blueprint", url_prefix="/genres")
@@ -21,6 +22,8 @@ class GenreList(HTTPMethodView):
     @admin_required
     async def post(self, request: Request, token: Token):
         genre = await Genre(**request.json).create()
+        await service.catalog.invalidate()
+        feed_service.pool.refresh()
         return JsonResponse(genre.to_dict(), status=200)
 
 
@@ -37,6 +40,8 @@ class GenreDetail(HTTPMethodView):
         if not genre:
             return JsonResponse({"message": "Genre not found"}, status=404)
         await genre.update(**request.json).apply()
+        await service.catalog.invalidate()
+        feed_service.pool.refresh()
         return JsonResponse({"message": "success"}, status=200)
 
     @admin_required
@@ -45,6 +50,8 @@ class GenreDetail(HTTPMethodView):
         if not genre:
             return JsonResponse({"message": "Genre not found"}, status=404)
         await genre.delete()
+        await service.catalog.invalidate()
+        feed_service.pool.refresh()
         return JsonResponse({"message": "success"}, status=204)
 
 
@@ -0,0 +1,82 @@
+from typing import Optional
+
+from sanic.request import Request
+from sanic.views import HTTPMethodView
+from sanic.blueprints import Blueprint
+from sanic_jwt_extended.tokens import Token
+from pydantic import constr
+
+from app.decorators import expect_query
+from app.core.sanic_jwt_extended import jwt_optional
+from app.services import search as search_service
+from app.services import enrichment as enrichment_service
+from app.schemas import SearchMode
+from app.utils import JsonResponse
+
+blueprint = Blueprint("search_blueprint", url_prefix="/search")
+
+
+class Search(HTTPMethodView):
+    @jwt_optional
+    @expect_query(
+        limit=(int, 20),
+        cursor=(int, None),
+        english=(constr(min_length=2), None),
+        korean=(constr(min_length=2), None),
+        mode=(SearchMode, SearchMode.regex),
+    )
+    async def get(
+        self,
+        request: Request,
+        limit: int,
+        cursor: Optional[int],
+        english: Optional[str],
+        korean: Optional[str],
+        mode: SearchMode,
+        token: Optional[Token],
+    ):
+        """
+        search lines whose english or korean(approved translations) matches
+
+        Queries:
+            english: keyword of english, matched as in /subtitles/search
+            korean: keyword of korean, matched as in /translations/search
+            mode: How to match the english keyword. See /subtitles/search.
+                Lines are ordered by id in every mode.
+            cursor: id of the last line
+
+        Response:
+            data: lines with `translation`, the latest matched one if any,
+                and `english_matched` and `korean_matched`
+            count: number of matched lines, only on the first page.
+                It is a lower bound or an estimate unless `count_exact` is true.
+                See `BILINGUAL_SEARCH_COUNT`
+        """
+        if not english and not korean:
+            return JsonResponse(
+                {"message": "english or korean is required"}, status=400
+            )
+
+        count, count_exact = None, None
+        if cursor is None:
+            count, count_exact = await search_service.count(
+                english, korean, mode.value
+            )
+        if count == 0 and count_exact:
+            return JsonResponse(
+                {"data": [], "count": 0, "count_exact": True, "cursor": cursor}
+            )
+
+        lines = await search_service.search(english, korean, limit, cursor, mode.value)
+        user_id = token.identity if token else None
+        data = await enrichment_service.enrich_lines(lines, user_id)
+        resp = {
+            "cursor": cursor,
+            "count": count,
+            "count_exact": count_exact,
+            "data": data,
+        }
+        return JsonResponse(resp, status=200)
+
+
+blueprint.add_route(Search.as_view(), "")
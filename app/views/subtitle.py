@@ -1,25 +1,32 @@
-from typing import List, Tuple, Dict, Any, Optional
+from typing import List, Optional
 from io import StringIO
 
+from sanic.log import logger
 from sanic.request import Request
 from sanic.response import text as text_response
 from sanic.views import HTTPMethodView
 from sanic.blueprints import Blueprint
 from sanic_jwt_extended import jwt_required
 from sanic_jwt_extended.tokens import Token
-from pydantic import constr
+from pydantic import conint, constr
 import asyncpg
 
-from app.models import User, Subtitle, Translation
+from app.models import User, Subtitle
 from app.decorators import expect_query, expect_body
 from app.core.sanic_jwt_extended import admin_required, jwt_optional
 from app.services import subtitle as subtitle_service
 from app.services import content as content_service
 from app.services import translation as translation_service
-from app.schemas import TranslationReviewStatus
-from app.core.subtitle import SRTSubtitle, SMISubtitle, SubtitleMatcher, SubtitleList
+from app.services import suggestion as suggestion_service
+from app.services import enrichment as enrichment_service
+from app.services import feed as feed_service
+from app.services import like as like_service
+from app.schemas import TranslationReviewStatus, SubtitleMatchMode, SearchMode
+from app.core.subtitle import SubtitleList
+from app.core.converter import convert as convert_subtitle
+from app.exceptions import UnsupportedExtension, ExecutorBusy
 from app.utils import JsonResponse, csv_to_dict
-from app import db
+from app import config, db
 
 blueprint = Blueprint("subtitle_blueprint", url_prefix="/subtitles")
 
@@ -39,10 +46,16 @@ class SubtitleListView(HTTPMethodView):
         return JsonResponse(resp, status=200)
 
     async def _upload_subtitle(self, data):
+        end_times = data.get("end_time") or [None] * len(data["time"])
         subtitles = [
-            {"time": int(time), "line": line, "content_id": content_id}
-            for time, line, content_id in zip(
-                data["time"], data["subtitle"], data["content_id"]
+            {
+                "time": int(time),
+                "end_time": int(end_time) if end_time else None,
+                "line": line,
+                "content_id": content_id,
+            }
+            for time, end_time, line, content_id in zip(
+                data["time"], end_times, data["subtitle"], data["content_id"]
             )
         ]
         await Subtitle.insert().gino.all(subtitles)
@@ -54,8 +67,7 @@ class SubtitleListView(HTTPMethodView):
             {"translation": trans, "line_id": sub["id"], "status": "APPROVED"}
             for trans, sub in zip(data["translation"], subtitles)
         ]
-
-        await Translation.insert().gino.all(translations)
+        await translation_service.create_many(translations)
 
     @admin_required
     @expect_query(content_id=(int, ...))
@@ -76,9 +88,28 @@ class SubtitleListView(HTTPMethodView):
             await self._upload_subtitle(data)
             if "translation" in data.keys():
                 await self._upload_translation(data)
+            await suggestion_service.add_content(content_id)
+        await subtitle_service.search_cache.invalidate()
+        await translation_service.search_cache.invalidate()
+        feed_service.pool.refresh()
         return JsonResponse({"message": "success"})
 
 
+class SuggestSubtitles(HTTPMethodView):
+    @expect_query(prefix=(constr(min_length=1), ...), limit=(conint(ge=1, le=50), 10))
+    async def get(self, request: Request, prefix: str, limit: int):
+        """
+        suggest english phrases starting with a prefix, most frequent first
+
+        Queries:
+            prefix: what is typed in the search box. A trailing space only
+                matches phrases continuing with next words
+            limit: count of phrases, up to 50
+        """
+        data = await suggestion_service.suggest(prefix, limit)
+        return JsonResponse({"data": data})
+
+
 class DownloadSubtitle(HTTPMethodView):
     @admin_required
     @expect_body(content_id=(int, ...))
@@ -102,29 +133,16 @@ class DownloadSubtitle(HTTPMethodView):
 
 
 class SubtitleToCSV(HTTPMethodView):
-    def _get_subtitle(self, file):
-        ext = file.name.split(".")[-1]
-        try:
-            text = file.body.decode()
-        except UnicodeDecodeError:
-            text = file.body.decode(encoding="euc-kr", errors="ignore")
-
-        if ext.lower() == "smi":
-            subtitle = SMISubtitle(text)
-        elif ext.lower() == "srt":
-            subtitle = SRTSubtitle(text)
-        else:
-            return JsonResponse(
-                {"message": "Extension '{ext}' not supported"}, status=400
-            )
-
-        return subtitle
-
     @admin_required
-    async def post(self, request: Request, token: Token):
+    @expect_query(mode=(SubtitleMatchMode, SubtitleMatchMode.start))
+    async def post(self, request: Request, mode: SubtitleMatchMode, token: Token):
         """
         Convert subtitle file into csv format
         It is used for manual processing of subtitle files not for user.
+        Parsing runs in `subtitle_executor` so that it doesn't block other requests.
+
+        Queries:
+            mode: How to match translations with subtitles (`start` or `overlap`)
         """
         sub_file = request.files.get("subtitle")
         trans_file = request.files.get("translation")
@@ -132,12 +150,25 @@ class SubtitleToCSV(HTTPMethodView):
         if not sub_file:
             return JsonResponse({"message": "Subtitle file required"}, status=400)
 
-        subtitle = self._get_subtitle(sub_file)
-        if trans_file:
-            translation = self._get_subtitle(trans_file)
-            subtitle = SubtitleMatcher(subtitle, translation).match()
+        try:
+            csvfile, encodings = await request.app.subtitle_executor.run(
+                convert_subtitle,
+                sub_file.name,
+                sub_file.body,
+                trans_file.name if trans_file else None,
+                trans_file.body if trans_file else None,
+                mode.value,
+            )
+        except UnsupportedExtension as e:
+            return JsonResponse({"message": str(e)}, status=400)
+        except ExecutorBusy as e:
+            return JsonResponse(
+                {"message": str(e)}, status=503, headers={"Retry-After": "10"}
+            )
+
+        for filename, encoding in encodings.items():
+            logger.info(f"Decoded subtitle file '{filename}' as {encoding}")
 
-        csvfile = subtitle.to_csv().getvalue()
         return text_response(
             csvfile,
             headers={"Content-Disposition": "attachment; filename=export.csv"},
@@ -149,59 +180,31 @@ class RandomSubtitles(HTTPMethodView):
     """
     This view is temporarily serving for main page.
     It will be replaced by a recommendation system or contents.
-    """
 
-    def _get_required_ids(self, lines: List[Dict[str, Any]]) -> Tuple[List[int]]:
-        content_ids = []
-        line_ids = []
-        for each in lines:
-            content_ids.append(each["content_id"])
-            line_ids.append(each["id"])
-        return content_ids, line_ids
+    Lines are picked from the feed pool. See `app.services.feed`
+    """
 
     @jwt_optional
-    @expect_query(max_count=(int, 30))
+    @expect_query(max_count=(conint(ge=1, le=100), 30))
     async def get(self, requeest: Request, max_count: int, token: Optional[Token]):
         """
         Queries:
-            max_count: Maximum count to pick
-                It does not ensure **exact count**.
+            max_count: Count to pick, up to 100. Fewer lines are picked
+                only when there are few translated lines.
         """
-        lines = await subtitle_service.pick_randomly(max_count)
-        content_ids, line_ids = self._get_required_ids(lines)
-        like_count = await subtitle_service.fetch_like_count(line_ids)
-        translation_count = await subtitle_service.fetch_translation_count(line_ids)
-        genres = await content_service.fetch_genres(content_ids)
         user_id = token.identity if token else None
-        user_liked = (
-            await subtitle_service.pick_user_liked(user_id, line_ids) if user_id else []
-        )
-        data = [
-            {
-                **line,
-                "genres": genres.get(line["content_id"], []),
-                "like_count": like_count.get(line["id"], 0),
-                "translation_count": translation_count.get(line["id"], 0),
-                "user_liked": line["id"] in user_liked,
-            }
-            for line in lines
-        ]
+        data = await feed_service.pick(max_count, user_id)
         resp = {"max_page": 1, "page": 1, "count": len(data), "data": data}
         return JsonResponse(resp, status=200)
 
 
 class SearchSubtitles(HTTPMethodView):
-    def _get_required_ids(self, lines: List[Dict[str, Any]]) -> Tuple[List[int]]:
-        content_ids = []
-        line_ids = []
-        for each in lines:
-            content_ids.append(each["content_id"])
-            line_ids.append(each["id"])
-        return content_ids, line_ids
-
     @jwt_optional
     @expect_query(
-        limit=(int, 20), cursor=(int, None), keyword=(constr(min_length=2), ...)
+        limit=(int, 20),
+        cursor=(int, None),
+        keyword=(constr(min_length=2), ...),
+        mode=(SearchMode, SearchMode.regex),
     )
     async def get(
         self,
@@ -209,41 +212,52 @@ class SearchSubtitles(HTTPMethodView):
         limit: int,
         cursor: Optional[int],
         keyword: str,
+        mode: SearchMode,
         token: Optional[Token],
     ):
-        """search english"""
+        """
+        search english
+
+        Queries:
+            mode: How to match the keyword (`regex`, `contains`, `prefix`, `word`,
+                `similar` or `fulltext`). Only `regex` reads the keyword as
+                a pattern, and patterns that can be slow are rejected with 400.
+                `fulltext` orders lines by relevance and adds
+                `headline`, the line with matched words in <b> tags.
+                `cursor` is the id of the last line in every mode.
+
+        Response:
+            count: number of matched lines, only on the first page.
+                It is a lower bound or an estimate unless `count_exact` is true.
+                See `SUBTITLE_SEARCH_COUNT`
+        """
 
-        count = await subtitle_service.count(keyword) if cursor is None else None
-        if count == 0:
-            return JsonResponse({"data": [], "count": 0, "cursor": cursor})
+        count, count_exact = None, None
+        if cursor is None:
+            count, count_exact = await subtitle_service.count(keyword, mode.value)
+        if count == 0 and count_exact:
+            return JsonResponse(
+                {"data": [], "count": 0, "count_exact": True, "cursor": cursor}
+            )
 
-        lines = await subtitle_service.search(keyword, limit, cursor)
-        content_ids, line_ids = self._get_required_ids(lines)
-        like_count = await subtitle_service.fetch_like_count(line_ids)
-        translation_count = await subtitle_service.fetch_translation_count(line_ids)
-        genres = await content_service.fetch_genres(content_ids)
+        lines = await subtitle_service.search(keyword, limit, cursor, mode.value)
         user_id = token.identity if token else None
-        user_liked = (
-            await subtitle_service.pick_user_liked(user_id, line_ids) if user_id else []
-        )
-        data = [
-            {
-                **line,
-                "genres": genres[line["content_id"]],
-                "like_count": like_count.get(line["id"], 0),
-                "translation_count": translation_count.get(line["id"], 0),
-                "user_liked": line["id"] in user_liked,
-            }
-            for line in lines
-        ]
-        resp = {"cursor": cursor, "count": count, "data": data}
+        data = await enrichment_service.enrich_lines(lines, user_id)
+        resp = {
+            "cursor": cursor,
+            "count": count,
+            "count_exact": count_exact,
+            "data": data,
+        }
         return JsonResponse(resp, status=200)
 
 
 class TranslationList(HTTPMethodView):
     @jwt_optional
     @expect_query(
-        status=(List[TranslationReviewStatus], None), limit=(int, 20), offset=(int, 0),
+        status=(List[TranslationReviewStatus], None),
+        limit=(int, 20),
+        cursor=(str, None),
     )
     async def get(
         self,
@@ -251,21 +265,20 @@ class TranslationList(HTTPMethodView):
         line_id: int,
         status: Optional[List[str]],
         limit: int,
-        offset: int,
+        cursor: Optional[str],
         token: Optional[Token],
     ):
-        translations = await subtitle_service.fetch_translations(
-            line_id, status, limit, offset
+        """
+        Queries:
+            cursor: `next_cursor` of the previous page
+        """
+        translations, next_cursor = await subtitle_service.fetch_translations(
+            line_id, status, limit, cursor
         )
 
-        if offset:
-            count = None
-        else:
-            count_obj = await subtitle_service.fetch_translation_count([line_id])
-            count = count_obj.get(line_id, 0)
+        count = None if cursor else await subtitle_service.count_translations(line_id)
 
         translation_ids = [each["id"] for each in translations]
-        like_count = await translation_service.fetch_like_count(translation_ids)
         user_id = token.identity if token else None
         user_liked = (
             await translation_service.pick_user_liked(user_id, translation_ids)
@@ -274,16 +287,13 @@ class TranslationList(HTTPMethodView):
         )
 
         data = [
-            {
-                **each,
-                "like_count": like_count.get(each["id"], 0),
-                "user_liked": each["id"] in user_liked,
-            }
-            for each in translations
+            {**each, "user_liked": each["id"] in user_liked} for each in translations
         ]
+        data = like_service.overlay(like_service.translation_likes, data, user_id)
         resp = {
             "limit": limit,
-            "offset": offset,
+            "cursor": cursor,
+            "next_cursor": next_cursor,
             "data": data,
             "count": count,
         }
@@ -297,9 +307,9 @@ class TranslationList(HTTPMethodView):
         trans = request.json["translation"]
         status = "APPROVED" if is_admin else "PENDING"
 
-        translation = await Translation(
-            translation=trans, status=status, line_id=line_id, user_id=user_id
-        ).create()
+        translation = await translation_service.create(line_id, trans, status, user_id)
+        if status == "APPROVED":
+            await translation_service.search_cache.invalidate()
         nickname = await User.select("nickname").where(User.id == user_id).gino.scalar()
         return JsonResponse(
             {**translation.to_dict(), "user": {"id": user_id, "nickname": nickname}},
@@ -310,7 +320,13 @@ class TranslationList(HTTPMethodView):
 class LikeSubtitle(HTTPMethodView):
     @jwt_required
     async def post(self, request: Request, line_id: int, token: Token):
+        """
+        With `LIKE_WRITE_BEHIND`, responds 202 at once and the like is written later
+        """
         user_id = token.identity
+        if config.LIKE_WRITE_BEHIND:
+            like_service.toggle(like_service.line_likes, user_id, line_id, True)
+            return JsonResponse({"message": "liked"}, status=202)
         try:
             await subtitle_service.add_like(line_id, user_id)
         except asyncpg.exceptions.UniqueViolationError:
@@ -320,19 +336,14 @@ class LikeSubtitle(HTTPMethodView):
     @jwt_required
     async def delete(self, request: Request, line_id: int, token: Token):
         user_id = token.identity
-        await subtitle_service.remove_like(line_id, user_id)
+        if config.LIKE_WRITE_BEHIND:
+            like_service.toggle(like_service.line_likes, user_id, line_id, False)
+        else:
+            await subtitle_service.remove_like(line_id, user_id)
         return JsonResponse({"message": "deleted like"}, status=204)
 
 
 class UserLikedSubtitles(HTTPMethodView):
-    def _get_required_ids(self, lines: List[Dict[str, Any]]) -> Tuple[List[int]]:
-        content_ids = []
-        line_ids = []
-        for each in lines:
-            content_ids.append(each["content_id"])
-            line_ids.append(each["id"])
-        return content_ids, line_ids
-
     @jwt_optional
     @expect_query(user_id=(str, ...), limit=(int, 20), cursor=(int, None))
     async def get(
@@ -346,24 +357,8 @@ class UserLikedSubtitles(HTTPMethodView):
         lines = await subtitle_service.fetch_user_liked(
             user_id, limit=limit, cursor=cursor
         )
-        content_ids, line_ids = self._get_required_ids(lines)
-        like_count = await subtitle_service.fetch_like_count(line_ids)
-        translation_count = await subtitle_service.fetch_translation_count(line_ids)
-        genres = await content_service.fetch_genres(content_ids)
         user_id = token.identity if token else None
-        user_liked = (
-            await subtitle_service.pick_user_liked(user_id, line_ids) if user_id else []
-        )
-        data = [
-            {
-                **line,
-                "genres": genres[line["content_id"]],
-                "like_count": like_count.get(line["id"], 0),
-                "translation_count": translation_count.get(line["id"], 0),
-                "user_liked": line["id"] in user_liked,
-            }
-            for line in lines
-        ]
+        data = await enrichment_service.enrich_lines(lines, user_id)
         resp = {"limit": limit, "cursor": cursor, "data": data}
 
         return JsonResponse(resp, status=200)
@@ -373,6 +368,7 @@ blueprint.add_route(SubtitleListView.as_view(), "")
 blueprint.add_route(DownloadSubtitle.as_view(), "/download-as-csv")
 blueprint.add_route(SubtitleToCSV.as_view(), "/convert-to-csv")
 blueprint.add_route(SearchSubtitles.as_view(), "/search")
+blueprint.add_route(SuggestSubtitles.as_view(), "/suggest")
 blueprint.add_route(RandomSubtitles.as_view(), "/random")
 blueprint.add_route(TranslationList.as_view(), "/<line_id:int>/translations")
 blueprint.add_route(LikeSubtitle.as_view(), "/<line_id:int>/like")
@@ -1,4 +1,4 @@
-from typing import List, Tuple, Dict, Any, Optional
+from typing import List, Optional
 from io import StringIO
 
 from sanic.request import Request
@@ -10,13 +10,14 @@ from pydantic import constr
 
 import asyncpg
 
+from app import config
 from app.decorators import expect_query, expect_body
 from app.core.sanic_jwt_extended import admin_required, jwt_optional
 from app.services import translation as translation_service
-from app.services import subtitle as subtitle_service
-from app.services import content as content_service
+from app.services import enrichment as enrichment_service
+from app.services import feed as feed_service
+from app.services import like as like_service
 from app.schemas import TranslationReviewStatus
-from app.models import Translation
 from app.utils import JsonResponse, csv_to_dict
 
 blueprint = Blueprint("translation_blueprint", url_prefix="translations")
@@ -28,7 +29,7 @@ class AddTranslationCSV(HTTPMethodView):
             {"translation": trans, "line_id": int(line_id), "status": "APPROVED"}
             for trans, line_id in zip(data["translation"], data["line_id"])
         ]
-        await Translation.insert().gino.all(translations)
+        await translation_service.create_many(translations)
 
     @admin_required
     async def post(self, request: Request, token: Token):
@@ -39,25 +40,40 @@ class AddTranslationCSV(HTTPMethodView):
             return JsonResponse({"message": "line_id field not found"}, status=400)
 
         await self._upload_translation(data)
+        await translation_service.search_cache.invalidate()
+        feed_service.pool.refresh()
         return JsonResponse({"message": "success"})
 
 
 class TranslationListView(HTTPMethodView):
     @admin_required
     @expect_query(
-        status=(List[TranslationReviewStatus], None), limit=(int, 20), offset=(int, 0)
+        status=(List[TranslationReviewStatus], None),
+        limit=(int, 20),
+        cursor=(str, None),
     )
     async def get(
         self,
         request: Request,
         status: Optional[List[TranslationReviewStatus]],
         limit: int,
-        offset: int,
+        cursor: Optional[str],
         token: Token,
     ):
-        data = await translation_service.fetch(status, limit, offset)
+        """
+        Queries:
+            cursor: `next_cursor` of the previous page
+        """
+        data, next_cursor = await translation_service.fetch(status, limit, cursor)
 
-        return JsonResponse({"data": data, "limit": limit, "offset": offset})
+        return JsonResponse(
+            {
+                "data": data,
+                "limit": limit,
+                "cursor": cursor,
+                "next_cursor": next_cursor,
+            }
+        )
 
 
 class TranslationDetail(HTTPMethodView):
@@ -83,7 +99,8 @@ class TranslationDetail(HTTPMethodView):
 
         status = "APPROVED" if is_admin else "PENDING"
 
-        await translation.update(translation=trans, status=status).apply()
+        await translation_service.update(translation_id, trans, status)
+        await translation_service.search_cache.invalidate()
         return JsonResponse({"message": "success"}, status=200)
 
     @jwt_required
@@ -97,21 +114,13 @@ class TranslationDetail(HTTPMethodView):
         if str(translation.user_id) != user_id:
             return JsonResponse({"message": "Permission Denied"}, status=403)
 
-        await translation.delete()
+        await translation_service.delete(translation_id)
+        if translation.status == "APPROVED":
+            await translation_service.search_cache.invalidate()
         return JsonResponse({"message": "success"}, status=204)
 
 
 class SearchTranslation(HTTPMethodView):
-    def _get_required_ids(self, translations: List[Dict[str, Any]]) -> Tuple[List[int]]:
-        content_ids = []
-        translation_ids = []
-        line_ids = []
-        for each in translations:
-            content_ids.append(each["content_id"])
-            translation_ids.append(each["id"])
-            line_ids.append(each["line_id"])
-        return content_ids, translation_ids, line_ids
-
     @jwt_optional
     @expect_query(
         limit=(int, 20), cursor=(int, None), keyword=(constr(min_length=2), ...)
@@ -124,40 +133,46 @@ class SearchTranslation(HTTPMethodView):
         keyword: str,
         token: Optional[Token],
     ):
-        """search korean(translations)"""
-        count = await translation_service.count(keyword) if cursor is None else None
-        if count == 0:
-            return JsonResponse({"data": [], "count": 0, "cursor": cursor})
+        """
+        search korean(translations)
+
+        Response:
+            count: number of matched translations, only on the first page.
+                It is a lower bound or an estimate unless `count_exact` is true.
+                See `TRANSLATION_SEARCH_COUNT`
+        """
+        count, count_exact = None, None
+        if cursor is None:
+            count, count_exact = await translation_service.count(keyword)
+        if count == 0 and count_exact:
+            return JsonResponse(
+                {"data": [], "count": 0, "count_exact": True, "cursor": cursor}
+            )
 
         translations = await translation_service.search(keyword, limit, cursor)
-        content_ids, translation_ids, line_ids = self._get_required_ids(translations)
-        genres = await content_service.fetch_genres(content_ids)
-        like_count = await translation_service.fetch_like_count(translation_ids)
-        translation_count = await subtitle_service.fetch_translation_count(line_ids)
         user_id = token.identity if token else None
-        user_liked = (
-            await translation_service.pick_user_liked(user_id, translation_ids)
-            if user_id
-            else []
-        )
-        data = [
-            {
-                **each,
-                "like_count": like_count.get(each["id"], 0),
-                "translation_count": translation_count.get(each["line_id"], 0),
-                "genres": genres[each["content_id"]],
-                "user_liked": each["id"] in user_liked,
-            }
-            for each in translations
-        ]
-        resp = {"cursor": cursor, "count": count, "data": data}
+        data = await enrichment_service.enrich_translations(translations, user_id)
+        resp = {
+            "cursor": cursor,
+            "count": count,
+            "count_exact": count_exact,
+            "data": data,
+        }
         return JsonResponse(resp)
 
 
 class LikeTranslation(HTTPMethodView):
     @jwt_required
     async def post(self, request: Request, translation_id: int, token: Token):
+        """
+        With `LIKE_WRITE_BEHIND`, responds 202 at once and the like is written later
+        """
         user_id = token.identity
+        if config.LIKE_WRITE_BEHIND:
+            like_service.toggle(
+                like_service.translation_likes, user_id, translation_id, True
+            )
+            return JsonResponse({"message": "liked"}, status=202)
         try:
             await translation_service.add_like(translation_id, user_id)
         except asyncpg.exceptions.UniqueViolationError:
@@ -167,21 +182,16 @@ class LikeTranslation(HTTPMethodView):
     @jwt_required
     async def delete(self, request: Request, translation_id: int, token: Token):
         user_id = token.identity
-        await translation_service.remove_like(translation_id, user_id)
+        if config.LIKE_WRITE_BEHIND:
+            like_service.toggle(
+                like_service.translation_likes, user_id, translation_id, False
+            )
+        else:
+            await translation_service.remove_like(translation_id, user_id)
         return JsonResponse({"message": "deleted like"}, status=204)
 
 
 class UserLikedTranslations(HTTPMethodView):
-    def _get_required_ids(self, translations: List[Dict[str, Any]]) -> Tuple[List[int]]:
-        content_ids = []
-        translation_ids = []
-        line_ids = []
-        for each in translations:
-            content_ids.append(each["content_id"])
-            translation_ids.append(each["id"])
-            line_ids.append(each["line_id"])
-        return content_ids, translation_ids, line_ids
-
     @jwt_optional
     @expect_query(user_id=(str, ...), limit=(int, 20), cursor=(int, None))
     async def get(
@@ -195,26 +205,8 @@ class UserLikedTranslations(HTTPMethodView):
         translations = await translation_service.fetch_user_liked(
             user_id, limit=limit, cursor=cursor
         )
-        content_ids, translation_ids, line_ids = self._get_required_ids(translations)
-        genres = await content_service.fetch_genres(content_ids)
-        like_count = await translation_service.fetch_like_count(translation_ids)
-        translation_count = await subtitle_service.fetch_translation_count(line_ids)
         user_id = token.identity if token else None
-        user_liked = (
-            await translation_service.pick_user_liked(user_id, translation_ids)
-            if user_id
-            else []
-        )
-        data = [
-            {
-                **each,
-                "like_count": like_count.get(each["id"], 0),
-                "translation_count": translation_count.get(each["line_id"], 0),
-                "genres": genres[each["content_id"]],
-                "user_liked": each["id"] in user_liked,
-            }
-            for each in translations
-        ]
+        data = await enrichment_service.enrich_translations(translations, user_id)
 
         return JsonResponse(
             {"limit": limit, "cursor": cursor, "data": data}, status=200
@@ -222,16 +214,6 @@ class UserLikedTranslations(HTTPMethodView):
 
 
 class UserWrittenTranslations(HTTPMethodView):
-    def _get_required_ids(self, translations: List[Dict[str, Any]]) -> Tuple[List[int]]:
-        content_ids = []
-        translation_ids = []
-        line_ids = []
-        for each in translations:
-            content_ids.append(each["content_id"])
-            translation_ids.append(each["id"])
-            line_ids.append(each["line_id"])
-        return content_ids, translation_ids, line_ids
-
     @jwt_optional
     @expect_query(user_id=(str, ...), limit=(int, 20), cursor=(int, None))
     async def get(
@@ -245,26 +227,8 @@ class UserWrittenTranslations(HTTPMethodView):
         translations = await translation_service.fetch_user_written(
             user_id, limit=limit, cursor=cursor
         )
-        content_ids, translation_ids, line_ids = self._get_required_ids(translations)
-        genres = await content_service.fetch_genres(content_ids)
-        like_count = await translation_service.fetch_like_count(translation_ids)
-        translation_count = await subtitle_service.fetch_translation_count(line_ids)
         user_id = token.identity if token else None
-        user_liked = (
-            await translation_service.pick_user_liked(user_id, translation_ids)
-            if user_id
-            else []
-        )
-        data = [
-            {
-                **each,
-                "like_count": like_count.get(each["id"], 0),
-                "translation_count": translation_count.get(each["line_id"], 0),
-                "genres": genres[each["content_id"]],
-                "user_liked": each["id"] in user_liked,
-            }
-            for each in translations
-        ]
+        data = await enrichment_service.enrich_translations(translations, user_id)
 
         return JsonResponse(
             {"limit": limit, "cursor": cursor, "data": data}, status=200
@@ -273,24 +237,35 @@ class UserWrittenTranslations(HTTPMethodView):
 
 class TranslationReviewList(HTTPMethodView):
     @admin_required
-    @expect_query(limit=(int, 20), offset=(int, 0))
+    @expect_query(limit=(int, 20), cursor=(str, None))
     async def get(
         self,
         request: Request,
         translation_id: int,
         limit: int,
-        offset: int,
+        cursor: Optional[str],
         token: Token,
     ):
-
+        """
+        Queries:
+            cursor: `next_cursor` of the previous page
+        """
         count = (
             await translation_service.count_reviews(translation_id)
-            if not offset
+            if not cursor
             else None
         )
-        data = await translation_service.fetch_reviews(translation_id, limit, offset)
+        data, next_cursor = await translation_service.fetch_reviews(
+            translation_id, limit, cursor
+        )
         return JsonResponse(
-            {"count": count, "data": data, "limit": limit, "offset": offset}
+            {
+                "count": count,
+                "data": data,
+                "limit": limit,
+                "cursor": cursor,
+                "next_cursor": next_cursor,
+            }
         )
 
     @admin_required
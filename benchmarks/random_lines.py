@@ -0,0 +1,102 @@
+"""
+Benchmark random lines of the home feed on generated corpora of growing size
+
+The sampling query used before (`random() < percentage` over the whole join) is
+compared with the current `subtitle_service.pick_randomly`. Lines and
+translations are generated in the database configured by the environment inside
+a transaction, which is rolled back at the end. Use a scratch database anyway,
+as tables are locked while it runs.
+
+Usage:
+    python -m benchmarks.random_lines [--sizes 100000,1000000] [--max-count 30]
+"""
+import asyncio
+
+import click
+
+from app import config, db
+from app.models import Subtitle, Translation, Content
+from app.services import subtitle as subtitle_service
+from benchmarks.subtitle_search import measure
+
+
+async def generate(rows: int, content_id: int) -> None:
+    """Lines with one or two translations, 60% of them translated"""
+    await db.status(
+        db.text(
+            """
+            WITH line AS (
+                INSERT INTO subtitle (line, time, content_id)
+                SELECT 'line ' || i, i * 1000, :content_id
+                FROM generate_series(1, :rows) AS i
+                RETURNING id
+            )
+            INSERT INTO translation (translation, status, line_id)
+            SELECT 'translation', 'APPROVED', id
+            FROM line, generate_series(1, 1 + id % 2)
+            WHERE random() < 0.6
+            """
+        ),
+        content_id=content_id,
+        rows=rows,
+    )
+    await db.status("ANALYZE subtitle")
+    await db.status("ANALYZE translation")
+
+
+async def sample_by_percentage(max_count: int) -> int:
+    """Pick lines as before, returning the count picked"""
+    total_count = await db.select([db.func.count(Subtitle.id)]).gino.scalar()
+    query = (
+        db.select([Subtitle.id, Translation.id, Content.id], distinct=Subtitle.id)
+        .select_from(
+            Subtitle.join(Content, Subtitle.content_id == Content.id).join(
+                Translation, Subtitle.id == Translation.line_id
+            )
+        )
+        .where(db.func.random() < max_count / total_count)
+    )
+    return len(await query.gino.all())
+
+
+async def benchmark(sizes, max_count, repeat):
+    await db.set_bind(config.DB_URL, **config.DB_KWARGS)
+    async with db.transaction() as tx:
+        content_id = await db.scalar(
+            "INSERT INTO content (title, year) VALUES ('benchmark', '2021') "
+            "RETURNING id"
+        )
+        print(
+            f"{'lines':>10} {'before (ms)':>12} {'picked':>7} "
+            f"{'after (ms)':>11} {'picked':>7}"
+        )
+        generated = 0
+        for size in sizes:
+            await generate(size - generated, content_id)
+            generated = size
+
+            before = await measure(sample_by_percentage, max_count, repeat=repeat)
+            before_count = await sample_by_percentage(max_count)
+            after = await measure(
+                subtitle_service.pick_randomly, max_count, repeat=repeat
+            )
+            after_count = len(await subtitle_service.pick_randomly(max_count))
+            print(
+                f"{size:>10} {before:>12.1f} {before_count:>7} "
+                f"{after:>11.1f} {after_count:>7}"
+            )
+
+        tx.raise_rollback()
+
+
+@click.command()
+@click.option("--sizes", default="10000,100000,1000000")
+@click.option("--max-count", default=30)
+@click.option("--repeat", default=5)
+def main(sizes, max_count, repeat):
+    sizes = sorted(int(each) for each in sizes.split(","))
+    asyncio.run(benchmark(sizes, max_count, repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Benchmark SubtitleMatcher on generated subtitles
+
+Usage:
+    python -m benchmarks.subtitle_matcher [--sizes 10000,100000] [--mode overlap]
+        [--long-cue]
+"""
+import random
+import timeit
+
+import click
+
+from app.core.subtitle import SubtitleList, SubtitleMatcher
+
+
+def generate_subtitles(size: int, seed: int) -> SubtitleList:
+    """Generate cues 1~4 seconds apart (in milliseconds), like a dialog heavy film"""
+    rand = random.Random(seed)
+    times = []
+    end_times = []
+    time = 0
+    for _ in range(size):
+        time += rand.randint(1000, 4000)
+        times.append(time)
+        end_times.append(time + rand.randint(500, 3000))
+    return SubtitleList.from_columns(
+        {
+            "time": times,
+            "end_time": end_times,
+            "subtitle": [f"line {i}" for i in range(size)],
+        }
+    )
+
+
+@click.command()
+@click.option("--sizes", default="10000,25000,50000,100000")
+@click.option("--mode", default="start", type=click.Choice(SubtitleMatcher.modes))
+@click.option("--repeat", default=3)
+@click.option(
+    "--long-cue", is_flag=True, help="Stretch the first subtitle to the last one"
+)
+def main(sizes, mode, repeat, long_cue):
+    print(f"{'cues':>8} {'total (ms)':>12} {'per cue (us)':>14}")
+    for size in (int(each) for each in sizes.split(",")):
+        subtitles = generate_subtitles(size, seed=1)
+        if long_cue:
+            # Like a credits cue shown over the others
+            end_times = subtitles.column("end_time")
+            end_times[0] = end_times[-1]
+        translations = generate_subtitles(size, seed=2)
+        matcher = SubtitleMatcher(subtitles, translations, mode=mode)
+        elapsed = min(timeit.repeat(matcher.match, number=1, repeat=repeat))
+        print(f"{size:>8} {elapsed * 1000:>12.1f} {elapsed / size * 1e6:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Benchmark subtitle search on a generated corpus, with and without the trigram index
+
+Lines are generated in the database configured by the environment inside a
+transaction, which is rolled back at the end. Use a scratch database anyway,
+as the subtitle table is locked while it runs.
+
+Usage:
+    python -m benchmarks.subtitle_search [--rows 2000000] [--keywords love,wonder]
+"""
+import asyncio
+import time
+
+import click
+
+from app import config, db
+from app.services import subtitle as subtitle_service
+
+WORDS = (
+    "i you he she we they it what where when why how do does did is are was were "
+    "have has had not never always just really love hate wonder know think look "
+    "at someone something nothing going inside their head well head home right "
+    "sorry thank please come back here there now then today tomorrow again "
+    "mom dad family friend joy sadness anger fear disgust memory island dream"
+).split()
+
+KEYWORDS = "love,wonder,look at someone,their head,sadnes,xylophone"
+MODES = ("regex", "contains", "similar")
+
+
+async def generate_lines(rows: int) -> None:
+    content_id = await db.scalar(
+        "INSERT INTO content (title, year) VALUES ('benchmark', '2021') RETURNING id"
+    )
+    # Lines of 3~12 random words, built on the server side
+    await db.status(
+        db.text(
+            """
+            WITH vocabulary AS (SELECT CAST(:words AS text[]) AS words)
+            INSERT INTO subtitle (line, time, content_id)
+            SELECT (
+                SELECT string_agg(word, ' ')
+                FROM (
+                    SELECT words[1 + floor(random() * cardinality(words))::int] AS word
+                    FROM generate_series(1, 3 + i % 10)
+                ) AS line_words
+            ), i * 1000, :content_id
+            FROM generate_series(1, :rows) AS i, vocabulary
+            """
+        ),
+        words=list(WORDS),
+        content_id=content_id,
+        rows=rows,
+    )
+    await db.status("ANALYZE subtitle")
+
+
+async def measure(coro_func, *args, repeat: int) -> float:
+    elapsed = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await coro_func(*args)
+        elapsed.append(time.perf_counter() - started)
+    return min(elapsed) * 1000
+
+
+async def run_searches(keywords, modes, repeat):
+    for mode in modes:
+        for keyword in keywords:
+            search = await measure(
+                subtitle_service.search, keyword, 20, None, mode, repeat=repeat
+            )
+            count = await measure(
+                subtitle_service.count, keyword, mode, "exact", repeat=repeat
+            )
+            print(f"{mode:>9} {keyword!r:>20} {search:>12.1f} {count:>12.1f}")
+
+
+async def benchmark(rows, keywords, repeat):
+    await db.set_bind(config.DB_URL, **config.DB_KWARGS)
+    async with db.transaction() as tx:
+        started = time.perf_counter()
+        await generate_lines(rows)
+        print(f"Generated {rows} lines in {time.perf_counter() - started:.1f}s")
+
+        header = f"{'mode':>9} {'keyword':>20} {'search (ms)':>12} {'count (ms)':>12}"
+        await db.status("DROP INDEX IF EXISTS line_idx_line_trgm")
+        print("\nWithout trigram index")
+        print(header)
+        await run_searches(keywords, ["regex", "contains"], repeat)
+
+        started = time.perf_counter()
+        await db.status(
+            "CREATE INDEX line_idx_line_trgm ON subtitle USING gin (line gin_trgm_ops)"
+        )
+        await db.status("ANALYZE subtitle")
+        print(f"\nBuilt trigram index in {time.perf_counter() - started:.1f}s")
+        print(header)
+        await run_searches(keywords, MODES, repeat)
+
+        tx.raise_rollback()
+
+
+@click.command()
+@click.option("--rows", default=2000000)
+@click.option("--keywords", default=KEYWORDS)
+@click.option("--repeat", default=3)
+def main(rows, keywords, repeat):
+    asyncio.run(benchmark(rows, keywords.split(","), repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Benchmark Korean search of approved translations on a generated corpus
+
+The regex scan used before the bigram index is compared with the current
+`translation_service.search` and `count`. Translations are generated in the
+database configured by the environment inside a transaction, which is rolled
+back at the end. Use a scratch database anyway, as tables are locked while it runs.
+
+Usage:
+    python -m benchmarks.translation_search [--rows 1000000] [--keywords 사랑,미안해]
+"""
+import asyncio
+import time
+
+import click
+
+from app import config, db
+from app.models import Translation
+from app.services import translation as translation_service
+from benchmarks.subtitle_search import measure
+
+WORDS = (
+    "나는 너는 우리 그들 정말 진짜 사랑해 미안해 고마워 괜찮아 무슨 일이야 어디 "
+    "가는 거야 지금 당장 여기 저기 다시 한번 생각해 봐 기억 머릿속 라일리 기쁨이 "
+    "슬픔이 버럭이 까칠이 소심이 엄마 아빠 친구 가족 집에 학교 하키 꿈 섬 알아요 "
+    "몰라요 그래서 하지만 그런데 왜 언제 어떻게 누가 뭐가 좋아 싫어 배고파 졸려"
+).split()
+
+KEYWORDS = "사랑,미안해,괜찮아요,무슨 일이야,머릿속에서,기쁨이와 슬픔이,하늘다람쥐"
+
+# Share of statuses in generated translations
+STATUSES = (("APPROVED", 0.6), ("PENDING", 0.3), ("REJECTED", 0.1))
+
+
+async def generate_translations(rows: int) -> None:
+    content_id = await db.scalar(
+        "INSERT INTO content (title, year) VALUES ('benchmark', '2021') RETURNING id"
+    )
+    line_id = await db.scalar(
+        db.text(
+            "INSERT INTO subtitle (line, time, content_id) "
+            "VALUES ('benchmark', 0, :content_id) RETURNING id"
+        ),
+        content_id=content_id,
+    )
+    approved, pending, _ = (share for _, share in STATUSES)
+    # Translations of 2~9 random words, built on the server side
+    await db.status(
+        db.text(
+            """
+            WITH vocabulary AS (SELECT CAST(:words AS text[]) AS words)
+            INSERT INTO translation (translation, status, line_id)
+            SELECT (
+                SELECT string_agg(word, ' ')
+                FROM (
+                    SELECT words[1 + floor(random() * cardinality(words))::int] AS word
+                    FROM generate_series(1, 2 + i % 8)
+                ) AS translation_words
+            ), CASE
+                WHEN random() < :approved THEN 'APPROVED'
+                WHEN random() < :pending / (1 - :approved) THEN 'PENDING'
+                ELSE 'REJECTED'
+            END, :line_id
+            FROM generate_series(1, :rows) AS i, vocabulary
+            """
+        ),
+        words=list(WORDS),
+        approved=approved,
+        pending=pending,
+        line_id=line_id,
+        rows=rows,
+    )
+
+
+async def regex_search(keyword: str) -> None:
+    """Search before the bigram index"""
+    await db.select([Translation.id]).where(
+        db.and_(
+            Translation.translation.op("~*")(keyword), Translation.status == "APPROVED"
+        )
+    ).order_by(Translation.id.desc()).limit(20).gino.all()
+
+
+async def regex_count(keyword: str) -> None:
+    """Count before the bigram index"""
+    await db.select([db.func.count(Translation.id)]).where(
+        db.and_(
+            Translation.translation.op("~*")(keyword), Translation.status == "APPROVED"
+        )
+    ).gino.scalar()
+
+
+async def benchmark(rows, keywords, repeat):
+    await db.set_bind(config.DB_URL, **config.DB_KWARGS)
+    async with db.transaction() as tx:
+        started = time.perf_counter()
+        await generate_translations(rows)
+        print(f"Generated {rows} translations in {time.perf_counter() - started:.1f}s")
+
+        started = time.perf_counter()
+        await db.status("REINDEX INDEX translation_idx_translation_bigrams")
+        await db.status("ANALYZE translation")
+        print(f"Built bigram index in {time.perf_counter() - started:.1f}s\n")
+
+        print(
+            f"{'keyword':>16} {'matches':>8} "
+            f"{'regex search':>13} {'regex count':>12} "
+            f"{'bigram search':>14} {'bigram count':>13}  (ms)"
+        )
+        for keyword in keywords:
+            matches, _ = await translation_service.count(keyword, "exact")
+            before = [
+                await measure(regex_search, keyword, repeat=repeat),
+                await measure(regex_count, keyword, repeat=repeat),
+            ]
+            after = [
+                await measure(
+                    translation_service.search, keyword, 20, None, repeat=repeat
+                ),
+                await measure(
+                    translation_service.count, keyword, "exact", repeat=repeat
+                ),
+            ]
+            print(
+                f"{keyword!r:>16} {matches:>8} {before[0]:>13.1f} {before[1]:>12.1f} "
+                f"{after[0]:>14.1f} {after[1]:>13.1f}"
+            )
+
+        tx.raise_rollback()
+
+
+@click.command()
+@click.option("--rows", default=1000000)
+@click.option("--keywords", default=KEYWORDS)
+@click.option("--repeat", default=3)
+def main(rows, keywords, repeat):
+    asyncio.run(benchmark(rows, keywords.split(","), repeat))
+
+
+if __name__ == "__main__":
+    main()
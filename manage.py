@@ -2,6 +2,7 @@ from functools import wraps
 import asyncio
 import json
 import os
+import time
 
 from alembic.command import current, revision, history, upgrade, downgrade
 from alembic.config import Config
@@ -112,6 +113,93 @@ async def init_genres(ctx):
     print("Successfully inserted genres")
 
 
+@cli.command()
+@click.option("--min-frequency", default=2, show_default=True)
+@coroutine
+async def build_suggestions(min_frequency):
+    """Build search-as-you-type suggestions from every subtitle line
+
+    Phrases appearing fewer than --min-frequency times are dropped.
+    Uploaded subtitles are added as they come, so run it again
+    to drop rare phrases and to forget deleted lines.
+    """
+    from app import db, config
+    from app.services import suggestion as suggestion_service
+
+    await db.set_bind(config.DB_URL, **config.DB_KWARGS)
+
+    started = time.perf_counter()
+    count = await suggestion_service.build(min_frequency)
+    elapsed = time.perf_counter() - started
+    print(f"Successfully built {count} suggestions in {elapsed:.1f}s")
+
+
+@cli.command()
+@coroutine
+async def recount():
+    """Count likes and translations again where their counts drifted
+
+    Counts are kept by the services. Rows changed otherwise, such as likes
+    and translations deleted along with their user, leave them behind.
+    """
+    from app import db, config
+    from app.services import subtitle as subtitle_service
+    from app.services import translation as translation_service
+
+    await db.set_bind(config.DB_URL, **config.DB_KWARGS)
+
+    started = time.perf_counter()
+    async with db.transaction():
+        lines = await subtitle_service.recount()
+        translations = await translation_service.recount()
+    elapsed = time.perf_counter() - started
+    print(
+        f"Successfully repaired counts of {lines} lines "
+        f"and {translations} translations in {elapsed:.1f}s"
+    )
+
+
+@cli.command()
+@click.argument("directory", type=click.Path(exists=True, file_okay=False))
+@click.option("--output", "-o", help="Directory to write csv files to")
+@click.option("--subtitle-ext", default="srt", show_default=True)
+@click.option("--translation-ext", default="smi", show_default=True)
+@click.option(
+    "--mode",
+    type=click.Choice(["start", "overlap"]),
+    default="start",
+    show_default=True,
+)
+@click.option("--workers", "-w", type=int, help="Number of processes to use")
+def convert_subtitles(directory, output, subtitle_ext, translation_ext, mode, workers):
+    """Convert subtitle files in a directory into csv files
+
+    Subtitle and translation files are paired by name
+    (e.g. InsideOut.srt and InsideOut.smi). csv files are written to
+    DIRECTORY unless --output is given, using as many processes as cores
+    unless --workers is given.
+    """
+    from app.core.converter import find_pairs, convert_all
+
+    output = output or directory
+    os.makedirs(output, exist_ok=True)
+    pairs = find_pairs(directory, subtitle_ext.lower(), translation_ext.lower())
+
+    started = time.perf_counter()
+    failed = 0
+    for output_path, count, error in convert_all(pairs, output, mode, workers):
+        if error:
+            failed += 1
+            print(f"Failed to convert {output_path}: {error!r}")
+        else:
+            print(f"Converted {output_path} ({count} lines)")
+
+    elapsed = time.perf_counter() - started
+    print(f"Converted {len(pairs) - failed}/{len(pairs)} files in {elapsed:.1f}s")
+    if failed:
+        raise SystemExit(1)
+
+
 @cli.command()
 def runserver():
     """Run server"""
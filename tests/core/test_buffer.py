@@ -0,0 +1,76 @@
+import asyncio
+
+import pytest
+
+from app.core.buffer import WriteBehindBuffer
+
+
+def test_write_behind_buffer_coalesce():
+    written = []
+
+    async def write(values):
+        written.append(dict(values))
+
+    buffer = WriteBehindBuffer(write, interval=60)
+    buffer.set("a", True)
+    buffer.set("b", True)
+    buffer.set("a", False)
+    assert len(buffer) == 2
+    assert buffer.get("a") is False
+    assert buffer.get("c") is None
+
+    assert asyncio.run(buffer.flush()) == 2
+    assert asyncio.run(buffer.flush()) == 0
+    assert written == [{"a": False, "b": True}]
+    assert len(buffer) == 0
+    assert buffer.get("a") is None
+
+
+def test_write_behind_buffer_failed():
+    async def run():
+        started = asyncio.Event()
+        failing = asyncio.Event()
+
+        async def write(values):
+            started.set()
+            await failing.wait()
+            raise ConnectionError
+
+        buffer = WriteBehindBuffer(write, interval=60)
+        buffer.set("a", True)
+        buffer.set("b", True)
+        task = asyncio.ensure_future(buffer.flush())
+        await started.wait()
+        # Values being written are still seen
+        assert buffer.get("a") is True
+        buffer.set("a", False)
+        failing.set()
+        with pytest.raises(ConnectionError):
+            await task
+        return buffer
+
+    buffer = asyncio.run(run())
+    # Failed values are kept, without overwriting newer ones
+    assert buffer.get("a") is False
+    assert buffer.get("b") is True
+    assert len(buffer) == 2
+
+
+def test_write_behind_buffer_run():
+    written = []
+
+    async def write(values):
+        written.append(dict(values))
+
+    async def run():
+        buffer = WriteBehindBuffer(write, interval=0.01)
+        task = asyncio.ensure_future(buffer.run())
+        buffer.set("a", True)
+        await asyncio.sleep(0.05)
+        buffer.set("b", True)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(run())
+    # Pending values are written when cancelled
+    assert written == [{"a": True}, {"b": True}]
@@ -0,0 +1,148 @@
+import asyncio
+
+import pytest
+
+from app.core.cache import (
+    CACHES,
+    CacheBackend,
+    ResultCache,
+    SnapshotCache,
+    TTLCache,
+)
+from app.utils import normalize_keyword
+
+
+def test_ttl_cache_expires(monkeypatch):
+    now = 100.0
+    monkeypatch.setattr("app.core.cache.time.monotonic", lambda: now)
+    cache = TTLCache(ttl=10)
+    cache.set("love", 3)
+    assert cache.get("love") == 3
+
+    now = 110.0
+    assert cache.get("love") is None
+    assert "love" not in cache
+    assert len(cache) == 0
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2)
+    cache.set("love", 1)
+    cache.set("hate", 2)
+    cache.get("love")
+    cache.set("wonder", 3)
+    assert "hate" not in cache
+    assert cache.get("love") == 1
+    assert cache.get("wonder") == 3
+
+
+def test_result_cache_invalidate():
+    async def run():
+        cache = ResultCache("test_search")
+        assert await cache.get("love", None, 20) is None
+        await cache.set("love", None, 20, value=[], version=cache.version)
+        assert await cache.get("love", None, 20) == []
+        await cache.invalidate()
+        assert await cache.get("love", None, 20) is None
+        return cache.stats()
+
+    stats = asyncio.run(run())
+    assert (stats["hits"], stats["misses"], stats["size"]) == (1, 2, 0)
+    assert CACHES["test_search"].stats() == stats
+
+
+def test_result_cache_invalidated_while_querying():
+    async def run():
+        cache = ResultCache("test_search_stale")
+        version = cache.version
+        assert await cache.get("love", None, 20) is None
+        # Data changes while the page is queried
+        await cache.invalidate()
+        await cache.set("love", None, 20, value=["stale"], version=version)
+        assert await cache.get("love", None, 20) is None
+        await cache.set("love", None, 20, value=["fresh"], version=cache.version)
+        return await cache.get("love", None, 20)
+
+    assert asyncio.run(run()) == ["fresh"]
+
+
+class SharedBackend(CacheBackend):
+    def __init__(self):
+        self.entries = {}
+
+    async def get(self, key):
+        return self.entries.get(key)
+
+    async def set(self, key, value, ttl):
+        self.entries[key] = value
+
+    async def clear(self, namespace):
+        for key in [each for each in self.entries if each.startswith(namespace)]:
+            del self.entries[key]
+
+
+def test_result_cache_backend():
+    async def run():
+        backend = SharedBackend()
+        # Caches of two workers
+        cache = ResultCache("test_shared", backend=backend)
+        other = ResultCache("test_shared", backend=backend)
+        await cache.set("love", None, 20, value=[1], version=cache.version)
+        assert await other.get("love", None, 20) == [1]
+        await other.invalidate()
+        return await cache.get("love", None, 20)
+
+    assert asyncio.run(run()) is None
+
+
+def test_snapshot_cache():
+    loads = []
+
+    async def load():
+        loads.append(None)
+        return len(loads)
+
+    async def run():
+        cache = SnapshotCache("test_catalog", load)
+        assert await cache.get() == 1
+        assert await cache.get() == 1
+        await cache.invalidate()
+        assert await cache.get() == 2
+        return cache.stats()
+
+    stats = asyncio.run(run())
+    assert (stats["hits"], stats["misses"]) == (1, 2)
+    assert CACHES["test_catalog"].stats() == stats
+
+
+def test_snapshot_cache_invalidated_while_loading():
+    values = iter(["stale", "fresh"])
+
+    async def run():
+        async def load():
+            value = next(values)
+            if value == "stale":
+                await cache.invalidate()
+            return value
+
+        cache = SnapshotCache("test_catalog", load)
+        # The stale value is returned but not kept
+        assert await cache.get() == "stale"
+        return await cache.get()
+
+    assert asyncio.run(run()) == "fresh"
+
+
+@pytest.mark.parametrize(
+    "keyword, mode, normalized",
+    [
+        ("  Look  at\tsomeone ", "contains", "look at someone"),
+        ("Look  At", "regex", "look  at"),
+        ("사랑해", "regex", "사랑해"),
+        (r"\S+ing", "regex", r"\S+ing"),
+        (r"A\s{2}B", "regex", r"A\s{2}B"),
+        (r"A.B", "word", "a.b"),
+    ],
+)
+def test_normalize_keyword(keyword, mode, normalized):
+    assert normalize_keyword(keyword, mode) == normalized
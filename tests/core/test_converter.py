@@ -0,0 +1,42 @@
+import csv
+import os
+
+from app.config import BASE_DIR
+from app.core.converter import find_pairs, convert_all, read_file
+from app.core.encoding import decode
+from app.core.subtitle import SMISubtitle
+
+SUBTITLE_DIR = os.path.join(BASE_DIR, "data/subtitles")
+
+
+def test_find_pairs(tmp_path):
+    for filename in ["A.srt", "A.smi", "B.srt", "C.smi", "notes.txt"]:
+        (tmp_path / filename).write_text("")
+
+    pairs = find_pairs(str(tmp_path))
+    assert pairs == [
+        (str(tmp_path / "A.srt"), str(tmp_path / "A.smi")),
+        (str(tmp_path / "B.srt"), None),
+    ]
+
+
+def test_convert_all(tmp_path):
+    pairs = find_pairs(SUBTITLE_DIR)
+    results = list(convert_all(pairs, str(tmp_path), workers=1))
+
+    assert results == [(str(tmp_path / "InsideOut.csv"), 1646, None)]
+    with open(tmp_path / "InsideOut.csv", encoding="utf-8-sig") as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == 1646
+    assert list(rows[1].keys()) == ["time", "end_time", "subtitle", "translation"]
+    assert rows[1]["subtitle"] == "JOY: Do you ever look at someone and wonder..."
+
+
+def test_read_file():
+    path = os.path.join(SUBTITLE_DIR, "InsideOut.smi")
+    subtitles, encoding = read_file(path)
+
+    with open(path, "rb") as f:
+        text, _ = decode(f.read())
+    assert encoding == "cp949"
+    assert subtitles == list(SMISubtitle(text))
@@ -0,0 +1,49 @@
+import codecs
+
+import pytest
+
+from app.core.encoding import SAMPLE_SIZE, decode, detect_encoding
+
+TEXT = "<SYNC Start=1000><P Class=KRCC>\n기쁨: 가끔 누군가를 보면서\n똠방각하\n"
+
+
+@pytest.mark.parametrize(
+    "body,expected",
+    [
+        (TEXT.encode(), "utf-8"),
+        (codecs.BOM_UTF8 + TEXT.encode(), "utf-8-sig"),
+        (TEXT.encode("utf-16"), "utf-16"),
+        (TEXT.encode("utf-16-le"), "utf-16-le"),
+        (TEXT.encode("utf-16-be"), "utf-16-be"),
+        (TEXT.replace("똠방각하", "").encode("euc-kr"), "euc-kr"),
+        (TEXT.encode("cp949"), "cp949"),
+    ],
+)
+def test_detect_encoding(body, expected):
+    assert detect_encoding(body) == expected
+
+    text, encoding = decode(body)
+    assert encoding == expected
+    assert text.lstrip("\ufeff") in (TEXT, TEXT.replace("똠방각하", ""))
+
+
+def test_detect_encoding_ascii():
+    assert decode(b"00:00:01,000 --> 00:00:02,000") == (
+        "00:00:01,000 --> 00:00:02,000",
+        "utf-8",
+    )
+
+
+def test_detect_encoding_after_ascii_prefix():
+    body = b"a" * 100 + TEXT.encode("cp949")
+    assert detect_encoding(body) == "cp949"
+    assert detect_encoding(body, sample_size=16) == "euc-kr"
+    assert decode(body) == ("a" * 100 + TEXT, "cp949")
+
+
+def test_decode_broken_file():
+    padding = "a" * SAMPLE_SIZE * 3
+    body = (TEXT + padding).encode() + "가".encode("cp949")
+    text, encoding = decode(body)
+    assert encoding == "utf-8"
+    assert text == TEXT + padding + "\ufffd" * 2
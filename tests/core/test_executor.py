@@ -0,0 +1,32 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.core.executor import BoundedExecutor
+from app.exceptions import ExecutorBusy
+
+
+def test_bounded_executor_cancelled():
+    release = threading.Event()
+
+    async def run():
+        executor = BoundedExecutor(max_workers=1, max_pending=0, use_processes=False)
+        task = asyncio.ensure_future(executor.run(release.wait))
+        await asyncio.sleep(0.01)
+        # The call keeps running after its caller is cancelled
+        task.cancel()
+        await asyncio.sleep(0.01)
+        with pytest.raises(ExecutorBusy):
+            await executor.run(sum, [1])
+
+        release.set()
+        await asyncio.sleep(0.01)
+        result = await executor.run(sum, [1, 2])
+        executor.shutdown()
+        return result
+
+    try:
+        assert asyncio.run(run()) == 3
+    finally:
+        release.set()
@@ -0,0 +1,45 @@
+import asyncio
+
+from app.core.feed import FeedPool
+
+
+def test_feed_pool_sample():
+    async def load():
+        return list(range(10))
+
+    pool = FeedPool(load, interval=60)
+    assert not pool.ready
+    assert pool.sample(3) == []
+
+    asyncio.run(pool.reload())
+    assert pool.ready
+    sample = pool.sample(3)
+    assert len(sample) == len(set(sample)) == 3
+    assert sorted(pool.sample(20)) == list(range(10))
+
+
+def test_feed_pool_refresh():
+    loads = []
+
+    async def load():
+        loads.append(len(loads))
+        if len(loads) == 2:
+            raise ConnectionError
+        return [len(loads)]
+
+    async def run():
+        pool = FeedPool(load, interval=60)
+        task = asyncio.ensure_future(pool.run())
+        await asyncio.sleep(0.01)
+        assert pool.items == [1]
+        # A failed load keeps the previous items
+        pool.refresh()
+        await asyncio.sleep(0.01)
+        assert pool.items == [1]
+        pool.refresh()
+        await asyncio.sleep(0.01)
+        task.cancel()
+        return pool.items
+
+    assert asyncio.run(run()) == [3]
+    assert len(loads) == 3
@@ -0,0 +1,35 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from app.core.pagination import decode_cursor, encode_cursor, split_page
+from app.exceptions import InvalidCursor
+from app.models import Translation
+
+KEYS = (Translation.created_at, Translation.id)
+
+
+def test_cursor_roundtrip():
+    values = (datetime(2021, 3, 1, 12, 30, 15, 123456, tzinfo=timezone.utc), 42)
+    assert decode_cursor(encode_cursor(values), KEYS) == values
+
+
+@pytest.mark.parametrize("cursor", ["", "abc", "e30.AAAA", "W10.AAAA.AAAA"])
+def test_decode_cursor_invalid(cursor):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor, KEYS)
+
+
+def test_decode_cursor_forged():
+    _, signature = encode_cursor((datetime.now(timezone.utc), 42)).split(".")
+    forged = encode_cursor((datetime.now(timezone.utc), 1)).split(".")[0]
+    with pytest.raises(InvalidCursor):
+        decode_cursor(f"{forged}.{signature}", KEYS)
+
+
+def test_split_page():
+    rows = [{"id": each, "created_at": datetime(2021, 3, each)} for each in (3, 2, 1)]
+    page, cursor = split_page(rows, KEYS, 2)
+    assert page == rows[:2]
+    assert decode_cursor(cursor, KEYS) == (datetime(2021, 3, 2), 2)
+    assert split_page(rows, KEYS, 3) == (rows, None)
@@ -1,7 +1,22 @@
+import io
+import os
+
 import pytest
 
-from app.core.subtitle import SMISubtitle, SRTSubtitle, SubtitleMatcher, SubtitleList
-from tests.data.core_reader import subtitle_matcher_data
+from app.config import BASE_DIR
+from app.core.subtitle import (
+    ASSSubtitle,
+    SMISubtitle,
+    SRTSubtitle,
+    SubtitleList,
+    SubtitleMatcher,
+    VTTSubtitle,
+    find_format,
+)
+from tests.data.core_reader import (
+    subtitle_matcher_data,
+    subtitle_overlap_matcher_data,
+)
 
 
 def test_read_smi():
@@ -17,16 +32,144 @@ def test_read_smi():
 
     subtitle = SMISubtitle(text)
     assert len(subtitle) == 4
-    assert subtitle[0]["time"] == 50
+    assert subtitle[0]["time"] == 50774
+    assert subtitle[0]["end_time"] == 52534
     assert subtitle[0]["subtitle"] == "누군가를 보며 궁금해한 적 있나요"
-    assert subtitle[1]["time"] == 52
+    assert subtitle[1]["time"] == 52534
+    assert subtitle[1]["end_time"] == 55303
     assert subtitle[1]["subtitle"] == "머릿속에서 무슨 일이 벌어지고 있을지?"
-    assert subtitle[2]["time"] == 55
+    assert subtitle[2]["time"] == 55303
+    assert subtitle[2]["end_time"] == 56901
     assert subtitle[2]["subtitle"] == "음, 전 알아요"
-    assert subtitle[3]["time"] == 56
+    assert subtitle[3]["time"] == 56901
+    assert subtitle[3]["end_time"] == 56901
     assert subtitle[3]["subtitle"] == "라일리의 머릿속은 잘 알죠"
 
 
+def test_read_vtt():
+    text = """WEBVTT
+Kind: captions
+
+NOTE This line is not a cue --
+
+1
+00:51.800 --> 00:53.290 align:start position:10%
+<v Joy><i>Do you ever look
+at someone and wonder...</i>
+
+00:00:53.520 --> 00:00:55.648
+<i>"What is going on</i>
+<i>inside their head?"</i>
+
+00:00:56.320 --> 00:00:59.403
+<c.yellow>Well, I know.</c> <00:00:58.000>Well, I know Riley&apos;s head.
+
+01:05.160 --> 01:07.162
+(BABY COOING)
+
+01:07.500 --> 01:08.000
+- Tom &amp; Jerry&nbsp;!"""
+
+    subtitle = VTTSubtitle(text)
+    assert list(subtitle) == [
+        {
+            "time": 51800,
+            "end_time": 53290,
+            "subtitle": "Do you ever look at someone and wonder...",
+        },
+        {
+            "time": 53520,
+            "end_time": 55648,
+            "subtitle": '"What is going on inside their head?"',
+        },
+        {
+            "time": 56320,
+            "end_time": 59403,
+            "subtitle": "Well, I know. Well, I know Riley's head.",
+        },
+        {"time": 67500, "end_time": 68000, "subtitle": "Tom & Jerry !"},
+    ]
+
+
+def test_read_vtt_malformed_timing():
+    text = """WEBVTT
+
+00:51.800 -->
+Skipped
+
+00:53.520 --> 00:55.648
+Read"""
+
+    subtitle = VTTSubtitle(text)
+    assert list(subtitle) == [{"time": 53520, "end_time": 55648, "subtitle": "Read"}]
+
+
+def test_read_ass():
+    text = """[Script Info]
+ScriptType: v4.00+
+
+[V4+ Styles]
+Format: Name, Fontname, Fontsize
+Style: Default,Arial,20
+
+[Events]
+Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
+Dialogue: 0,0:00:51.80,0:00:53.29,Default,Joy,0,0,0,,{\\i1}Do you\\hever look\\Nat
+Dialogue: 0,0:00:51.80,0:00:53.29,Default,Joy,0,0,0,,someone and wonder, really...{\\i0}
+Comment: 0,0:00:52.00,0:00:53.00,Default,,0,0,0,,Not a cue
+Dialogue: 0,0:00:53.52,0:00:55.64,Default,,0,0,0,,"What is going on\\nin their head?"
+Dialogue: 0,0:01:05.16,0:01:07.16,Default,,0,0,0,,(BABY COOING)
+"""
+
+    subtitle = ASSSubtitle(text)
+    assert list(subtitle) == [
+        {
+            "time": 51800,
+            "end_time": 53290,
+            "subtitle": "Do you ever look at",
+        },
+        {
+            "time": 51800,
+            "end_time": 53290,
+            "subtitle": "someone and wonder, really...",
+        },
+        {
+            "time": 53520,
+            "end_time": 55640,
+            "subtitle": '"What is going on in their head?"',
+        },
+    ]
+
+
+def test_read_ass_out_of_order():
+    text = """[Script Info]
+
+[Events]
+Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
+Dialogue: 0,0:00:53.52,0:00:55.64,Default,,0,0,0,,Second
+Dialogue: 0,0:00:51.80,0:00:53.29,Default,,0,0,0,,First
+Dialogue: 0,0:00:53.52,0:00:55.64,Default,,0,0,0,,Third
+"""
+
+    subtitle = ASSSubtitle(text)
+    assert [each["subtitle"] for each in subtitle] == ["First", "Second", "Third"]
+
+
+@pytest.mark.parametrize(
+    "filename,text,expected",
+    [
+        ("a.srt", "1\n00:00:01,000 --> 00:00:02,000\nHi", SRTSubtitle),
+        ("a.SMI", "<SAMI><BODY></BODY></SAMI>", SMISubtitle),
+        ("a.txt", "\ufeffWEBVTT\n\n00:01.000 --> 00:02.000\nHi", VTTSubtitle),
+        ("a.srt", "[Script Info]\nScriptType: v4.00+", ASSSubtitle),
+        ("a.ssa", "", ASSSubtitle),
+        ("a.txt", "Hi", None),
+    ],
+)
+def test_find_format(filename, text, expected):
+    assert find_format(filename, text) is expected
+
+
 def test_read_srt():
     text = """2
 00:00:51,800 --> 00:00:53,290
@@ -54,16 +197,67 @@ Hmm?
     subtitle = SRTSubtitle(text)
     assert len(subtitle) == 4
 
-    assert subtitle[0]["time"] == 51
+    assert subtitle[0]["time"] == 51800
+    assert subtitle[0]["end_time"] == 53290
     assert subtitle[0]["subtitle"] == "JOY: Do you ever look at someone and wonder..."
-    assert subtitle[1]["time"] == 53
+    assert subtitle[1]["time"] == 53520
+    assert subtitle[1]["end_time"] == 55648
     assert subtitle[1]["subtitle"] == '"What is going on inside their head?"'
-    assert subtitle[2]["time"] == 56
+    assert subtitle[2]["time"] == 56320
+    assert subtitle[2]["end_time"] == 59403
     assert subtitle[2]["subtitle"] == "Well, I know. Well, I know Riley's head."
-    assert subtitle[3]["time"] == 95
+    assert subtitle[3]["time"] == 95640
+    assert subtitle[3]["end_time"] == 96641
     assert subtitle[3]["subtitle"] == "Hmm?"
 
 
+def test_read_srt_file():
+    with open(os.path.join(BASE_DIR, "data/subtitles/InsideOut.srt")) as f:
+        subtitle = SRTSubtitle(f.read())
+
+    assert len(subtitle) == 1646
+    assert subtitle[0]["time"] == 1
+    assert subtitle[0]["subtitle"] == "Sync By: Luis-Subs Improved By: Fidel33"
+    assert subtitle[1]["time"] == 51800
+    assert subtitle[1]["subtitle"] == "JOY: Do you ever look at someone and wonder..."
+    assert subtitle[-1]["time"] == 5293921
+    assert subtitle[-1]["end_time"] == 5305925
+    assert (
+        subtitle[-1]["subtitle"]
+        == "Improved By: Fidel33\nSub Upload Date: October 20, 2015"
+    )
+
+
+def test_iter_cues_from_binary_stream():
+    text = """<SAMI><BODY>
+<SYNC Start=50774><P Class=KRCC>
+누군가를 보며<br>궁금해한 적 있나요
+<SYNC Start=52534><P Class=KRCC>
+머릿속에서 무슨 일이<br>벌어지고 있을지?
+</BODY></SAMI>"""
+    stream = io.BytesIO(text.encode("cp949"))
+
+    cues = SMISubtitle.iter_cues(stream, encoding="cp949")
+    assert next(cues) == {
+        "time": 50774,
+        "end_time": 52534,
+        "subtitle": "누군가를 보며 궁금해한 적 있나요",
+    }
+    assert list(cues) == [
+        {"time": 52534, "end_time": 52534, "subtitle": "머릿속에서 무슨 일이 벌어지고 있을지?"}
+    ]
+    assert not stream.closed
+
+
+def test_iter_cues_matches_read():
+    with open(os.path.join(BASE_DIR, "data/subtitles/InsideOut.srt"), "rb") as f:
+        cues = list(SRTSubtitle.iter_cues(f))
+        f.seek(0)
+        subtitle = SRTSubtitle(f.read().decode())
+
+    assert cues == list(subtitle)
+
+
 @pytest.mark.parametrize("subtitle,translation,matched", subtitle_matcher_data)
 def test_subtitle_matcher(subtitle, translation, matched):
     subtitle = SubtitleList(subtitle)
@@ -71,3 +265,41 @@ def test_subtitle_matcher(subtitle, translation, matched):
     matcher = SubtitleMatcher(subtitle, translation)
     result = matcher.match()
     assert result == matched
+
+
+@pytest.mark.parametrize(
+    "subtitle,translation,matched", subtitle_overlap_matcher_data
+)
+def test_subtitle_matcher_overlap(subtitle, translation, matched):
+    subtitle = SubtitleList(subtitle)
+    translation = SubtitleList(translation)
+    matcher = SubtitleMatcher(subtitle, translation, mode="overlap")
+    result = matcher.match()
+    assert list(result.column("translation")) == matched
+
+
+def test_subtitle_list():
+    subtitles = SubtitleList(
+        [
+            {"time": 50, "subtitle": "what is your name?"},
+            {"time": 56, "subtitle": "My name is John."},
+        ]
+    )
+    subtitles.append({"time": 70, "subtitle": "My name is Jane."})
+
+    assert len(subtitles) == 3
+    assert subtitles[-1] == {"time": 70, "subtitle": "My name is Jane."}
+    assert subtitles[1:] == [
+        {"time": 56, "subtitle": "My name is John."},
+        {"time": 70, "subtitle": "My name is Jane."},
+    ]
+    assert subtitles.column("time").typecode == "i"
+    assert subtitles.to_csv().getvalue() == (
+        "time,subtitle\r\n"
+        "50,what is your name?\r\n"
+        "56,My name is John.\r\n"
+        "70,My name is Jane.\r\n"
+    )
+
+    with pytest.raises(ValueError):
+        subtitles.append({"time": 80})
@@ -0,0 +1,42 @@
+import pytest
+
+from app.core.regex import check_regex
+from app.exceptions import InvalidKeyword
+
+
+@pytest.mark.parametrize(
+    "pattern",
+    [
+        "love",
+        "^i (love|hate) you$",
+        r"\mlove\M",
+        "[[:alpha:]]+ing",
+        "[]a]x",
+        "so+?rry",
+        "a{2,5}",
+        "사랑(해|한다)",
+    ],
+)
+def test_check_regex(pattern):
+    check_regex(pattern)
+
+
+@pytest.mark.parametrize(
+    "pattern",
+    [
+        "(a+)+$",
+        "(a|b*)*",
+        ".*.*.*x",
+        "a{1,100}",
+        r"(a)\1",
+        "(?=a)",
+        "(ab",
+        "ab)",
+        "a**",
+        "[ab",
+        "a" * 101,
+    ],
+)
+def test_check_regex_rejects(pattern):
+    with pytest.raises(InvalidKeyword):
+        check_regex(pattern)
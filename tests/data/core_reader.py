@@ -130,3 +130,48 @@ subtitle_matcher_data = [
         ],
     ),
 ]
+
+subtitle_overlap_matcher_data = [
+    # 번역이 다음 자막 시작 전에 시작하지만 대부분 다음 자막과 겹침
+    (
+        [
+            {"time": 0, "end_time": 2000, "subtitle": "what is your name?"},
+            {"time": 2000, "end_time": 5000, "subtitle": "My name is John."},
+            {"time": 5000, "end_time": 8000, "subtitle": "My name is Jane."},
+        ],
+        [
+            {"time": 0, "end_time": 2500, "subtitle": "이름이 뭐야?"},
+            {"time": 2600, "end_time": 4700, "subtitle": "내 이름은 John이야."},
+            {"time": 4800, "end_time": 8000, "subtitle": "내 이름은 Jane이야."},
+        ],
+        ["이름이 뭐야?", "내 이름은 John이야.", "내 이름은 Jane이야."],
+    ),
+    # 겹치는 자막이 없는 번역은 그 전에 시작한 자막에 붙음
+    (
+        [
+            {"time": 0, "end_time": 2000, "subtitle": "what is your name?"},
+            {"time": 2000, "end_time": 5000, "subtitle": "My name is John."},
+        ],
+        [
+            {"time": 500, "end_time": 1500, "subtitle": "이름이 뭐야?"},
+            {"time": 2000, "end_time": 4000, "subtitle": "내 이름은 John이야."},
+            {"time": 9000, "end_time": 9500, "subtitle": "고마워"},
+        ],
+        ["이름이 뭐야?", "내 이름은 John이야. 고마워"],
+    ),
+    # 끝까지 이어지는 자막이 있어도 더 많이 겹치는 자막에 붙음
+    (
+        [
+            {"time": 0, "end_time": 2000, "subtitle": "what is your name?"},
+            {"time": 2000, "end_time": 4000, "subtitle": "My name is John."},
+            {"time": 3500, "end_time": 100000, "subtitle": "Directed by Jane"},
+        ],
+        [
+            {"time": 0, "end_time": 2000, "subtitle": "이름이 뭐야?"},
+            {"time": 2000, "end_time": 4000, "subtitle": "내 이름은 John이야."},
+            {"time": 5000, "end_time": 90000, "subtitle": "감독 Jane"},
+            {"time": 100500, "end_time": 101000, "subtitle": "끝"},
+        ],
+        ["이름이 뭐야?", "내 이름은 John이야.", "감독 Jane 끝"],
+    ),
+]
@@ -0,0 +1,27 @@
+from app.services.enrichment import merge
+
+
+def test_merge():
+    rows = [{"id": 1, "content_id": 10}, {"id": 2, "content_id": 20}]
+    extra = [{"id": 1, "like_count": 3, "translation_count": 2, "user_liked": True}]
+    genres = {10: [{"id": 1, "name": "Drama"}]}
+
+    assert merge(rows, extra, genres) == [
+        {
+            "id": 1,
+            "content_id": 10,
+            "genres": [{"id": 1, "name": "Drama"}],
+            "like_count": 3,
+            "translation_count": 2,
+            "user_liked": True,
+        },
+        # Deleted after it was listed
+        {
+            "id": 2,
+            "content_id": 20,
+            "genres": [],
+            "like_count": 0,
+            "translation_count": 0,
+            "user_liked": False,
+        },
+    ]
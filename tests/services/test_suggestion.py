@@ -0,0 +1,22 @@
+import re
+
+import pytest
+
+from app.services.suggestion import WORD_PATTERN, normalize_prefix
+
+
+@pytest.mark.parametrize(
+    "prefix, normalized",
+    [
+        ("Look  AT", "look at"),
+        ("look at ", "look at "),
+        ("don't", "don't"),
+        ("'cause I", "cause i"),
+        ("rock 'n' ", "rock n "),
+        ("''", ""),
+    ],
+)
+def test_normalize_prefix(prefix, normalized):
+    assert normalize_prefix(prefix) == normalized
+    # Words are split as phrases are when suggestions are built
+    assert re.findall(WORD_PATTERN, normalized) == normalized.split()